@@ -1 +1,4 @@
-from backend.main import app  # ASGI app for Vercel Python runtime
+# ASGI app for Vercel Python runtime. Importing it is cheap: the dataset is
+# loaded on first request, from data/serving.pkl when prebuilt
+# (scripts/build_artifact.py).
+from backend.main import app
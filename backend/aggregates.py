@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.cleaning import AGE_COLS, filter_df
+except ModuleNotFoundError:
+    from cleaning import AGE_COLS, filter_df
+
+
+def date_bounds(dates, start: pd.Timestamp | None, end: pd.Timestamp | None) -> tuple[int, int]:
+    """Positions ``lo, hi`` such that ``dates[lo:hi]`` is the inclusive range ``[start, end]``.
+
+    ``dates`` must be sorted. Bounds outside the data are clamped before the
+    search, which then runs in the data's own resolution, so far-past or
+    far-future bounds never overflow a nanosecond conversion.
+    """
+
+    dates = pd.DatetimeIndex(dates)
+    n = len(dates)
+    if n == 0:
+        return 0, 0
+    first, last = dates[0], dates[-1]
+
+    if start is None or start <= first:
+        lo = 0
+    elif start > last:
+        lo = n
+    else:
+        lo = int(dates.searchsorted(start, side="left"))
+
+    if end is None or end >= last:
+        hi = n
+    elif end < first:
+        hi = 0
+    else:
+        hi = int(dates.searchsorted(end, side="right"))
+    return lo, max(lo, hi)
+
+
+@dataclass(frozen=True)
+class PrefixSums:
+    """Cumulative-by-date age bucket totals per (state, district).
+
+    ``cum[e, i, k]`` holds the sum of age bucket ``k`` for entity ``e`` over all
+    dates strictly before ``dates[i]`` (with ``cum[e, len(dates), k]`` being the
+    grand total), so any inclusive date range reduces to one subtraction per
+    entity instead of a pass over the rows. ``counts`` tracks row counts the
+    same way.
+    """
+
+    entities: pd.DataFrame
+    dates: np.ndarray
+    cum: np.ndarray
+    counts: np.ndarray
+    age_cols: tuple[str, ...]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> "PrefixSums":
+        age_cols = tuple(age_cols)
+        if df.empty:
+            return cls(
+                entities=pd.DataFrame({"state": pd.Series(dtype=object), "district": pd.Series(dtype=object)}),
+                dates=np.array([], dtype="datetime64[us]"),
+                cum=np.zeros((0, 1, len(age_cols))),
+                counts=np.zeros((0, 1), dtype=np.int64),
+                age_cols=age_cols,
+            )
+
+        ent_codes, ent_index = pd.MultiIndex.from_frame(df[["state", "district"]]).factorize()
+        date_codes, date_index = pd.factorize(df["date"], sort=True)
+
+        cum = np.zeros((len(ent_index), len(date_index) + 1, len(age_cols)))
+        np.add.at(cum, (ent_codes, date_codes + 1), df[list(age_cols)].to_numpy(dtype=float))
+        np.cumsum(cum, axis=1, out=cum)
+
+        counts = np.zeros((len(ent_index), len(date_index) + 1), dtype=np.int64)
+        np.add.at(counts, (ent_codes, date_codes + 1), 1)
+        np.cumsum(counts, axis=1, out=counts)
+
+        entities = ent_index.to_frame(index=False, name=["state", "district"])
+        return cls(
+            entities=entities,
+            # Kept in the frame's own resolution; see date_bounds
+            dates=np.asarray(date_index.values),
+            cum=cum,
+            counts=counts,
+            age_cols=age_cols,
+        )
+
+    def window(self, start: pd.Timestamp | None, end: pd.Timestamp | None) -> tuple[np.ndarray, np.ndarray]:
+        """Return per-entity age bucket sums and row counts for ``[start, end]``."""
+
+        lo, hi = date_bounds(self.dates, start, end)
+        return self.cum[:, hi, :] - self.cum[:, lo, :], self.counts[:, hi] - self.counts[:, lo]
+
+    def entity_mask(
+        self,
+        *,
+        states: list[str] | None,
+        districts: list[str] | None,
+        search: str | None,
+    ) -> np.ndarray:
+        """Boolean mask over ``entities`` matching the non-date filters.
+
+        Reuses ``filter_df`` on the entity table so state/district/search
+        semantics stay identical to the row-level endpoints.
+        """
+
+        kept = filter_df(self.entities, start=None, end=None, states=states, districts=districts, search=search)
+        mask = np.zeros(len(self.entities), dtype=bool)
+        mask[kept.index.to_numpy()] = True
+        return mask
+
+
+@dataclass(frozen=True)
+class StateDateCube:
+    """Daily age bucket totals and row counts per state, sorted by date.
+
+    Collapses the district dimension, which shrinks the table by roughly the
+    number of districts per state for time-series queries that do not filter
+    or group on districts.
+    """
+
+    frame: pd.DataFrame
+    age_cols: tuple[str, ...]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> "StateDateCube":
+        age_cols = tuple(age_cols)
+        grouped = df.groupby(["date", "state"], sort=True)
+        frame = grouped[list(age_cols)].sum()
+        frame["rows"] = grouped.size()
+        return cls(frame=frame.reset_index(), age_cols=age_cols)
+
+    def slice(
+        self,
+        start: pd.Timestamp | None,
+        end: pd.Timestamp | None,
+        states: list[str] | None,
+    ) -> pd.DataFrame:
+        out = self.frame
+        lo, hi = date_bounds(out["date"], start, end)
+        out = out.iloc[lo:hi]
+        if states:
+            out = out[out["state"].isin(states)]
+        return out
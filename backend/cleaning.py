@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import re
-from difflib import SequenceMatcher
-from typing import Iterable
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterable, Iterator
 
+import numpy as np
 import pandas as pd
 
+try:
+    from backend.districts import DistrictDictionary, resolve_districts
+except ModuleNotFoundError:
+    from districts import DistrictDictionary, resolve_districts
 
+
+# Measure columns of the enrolment feed, the default schema. Other feeds pass
+# their own ``age_cols`` (see backend/datasets.py).
 AGE_COLS: tuple[str, str, str] = ("age_0_5", "age_5_17", "age_18_greater")
-REQUIRED_COLS: set[str] = {"date", "state", "district", *AGE_COLS}
 
 
 def _standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -134,230 +143,203 @@ def _normalize_district(value: object) -> str:
     return _title_phrase(lower) or "Unknown"
 
 
-def _merge_rare_district_variants(
+def _canonicalize_districts(
     df: pd.DataFrame,
+    dictionary: DistrictDictionary | None = None,
     *,
     rare_max_occ: int = 3,
     candidate_min_occ: int = 8,
     similarity_threshold: float = 0.92,
-) -> pd.DataFrame:
-    """Merge rare district strings into the closest common district (per state).
-
-    Goal: reduce typo/case/punctuation-driven fragmentation without needing a full
-    external district master list.
+) -> tuple[pd.DataFrame, dict[tuple[str, str], str]]:
+    """Map each (state, district) to its canonical district.
 
-    This only merges within the same state, and only when the source district is
-    rare and the best match is both common and highly similar.
+    Returns the frame and the resolved mapping for every pair present, which
+    is what ``DistrictDictionary.learned`` persists. Resolution runs once per
+    unique pair and is applied to all rows with a single take.
     """
 
     if df.empty:
-        return df
-
-    occ = df.groupby(["state", "district"], sort=False).size().rename("n")
-    occ = occ.reset_index()
-
-    # Pre-compute token sets for speed and safety
-    def tokens(s: str) -> set[str]:
-        parts = re.split(r"[\s\-]+", s.lower().strip())
-        return {p for p in parts if p and p not in {"and", "of", "the"}}
-
-    by_state = {}
-    for state, sub in occ.groupby("state", sort=False):
-        by_state[state] = {
-            row["district"]: {
-                "n": int(row["n"]),
-                "tok": tokens(str(row["district"]))
-            }
-            for _, row in sub.iterrows()
-        }
-
-    mapping: dict[tuple[str, str], str] = {}
-
-    for state, info in by_state.items():
-        rare = [d for d, meta in info.items() if meta["n"] <= rare_max_occ]
-        common = [d for d, meta in info.items() if meta["n"] >= candidate_min_occ]
-        if not rare or len(common) < 2:
-            continue
-
-        for d in rare:
-            d_tok = info[d]["tok"]
-            if not d_tok:
-                continue
-
-            best = None
-            best_score = 0.0
-            for c in common:
-                if c == d:
-                    continue
-
-                c_tok = info[c]["tok"]
-                inter = len(d_tok & c_tok)
-                union = len(d_tok | c_tok)
-                jacc = (inter / union) if union else 0.0
-
-                # Guardrail: require meaningful token overlap
-                if jacc < 0.5:
-                    continue
-
-                score = SequenceMatcher(None, d.lower(), c.lower()).ratio()
-                if score > best_score:
-                    best_score = score
-                    best = c
-
-            if best and best_score >= similarity_threshold:
-                mapping[(state, d)] = best
-
-    if not mapping:
-        return df
+        return df, {}
+
+    # Factorize each column, then the combined integer key: much cheaper than
+    # hashing string pairs, and pairs stay in first-seen order
+    state_codes, state_names = pd.factorize(df["state"])
+    district_codes, district_names = pd.factorize(df["district"])
+    codes, keys = pd.factorize(state_codes.astype(np.int64) * len(district_names) + district_codes)
+    states = [str(v) for v in state_names[keys // len(district_names)]]
+    names = [str(v) for v in district_names[keys % len(district_names)]]
+
+    canonical = resolve_districts(
+        states,
+        names,
+        np.bincount(codes, minlength=len(keys)),
+        dictionary or DistrictDictionary(),
+        rare_max_occ=rare_max_occ,
+        candidate_min_occ=candidate_min_occ,
+        similarity_threshold=similarity_threshold,
+    )
+    mapping = dict(zip(zip(states, names), canonical))
+    if all(c == name for (_, name), c in mapping.items()):
+        return df, mapping
 
     out = df.copy()
-    out["district"] = out.apply(
-        lambda r: mapping.get((r["state"], r["district"]), r["district"]), axis=1
+    out["district"] = pd.Series(
+        np.asarray(canonical, dtype=object)[codes], index=df.index, dtype=df["district"].dtype
     )
-    return out
+    return out, mapping
 
 
-def clean_dataframe(
-    raw_df: pd.DataFrame,
+def _merge_rare_district_variants(
+    df: pd.DataFrame,
     *,
-    merge_rare_district_variants: bool = True,
     rare_max_occ: int = 3,
     candidate_min_occ: int = 8,
     similarity_threshold: float = 0.92,
+    dictionary: DistrictDictionary | None = None,
 ) -> pd.DataFrame:
-    """Logically clean the raw Aadhaar enrollment dataset.
+    """Merge rare district strings into the closest common district (per state).
 
-    - Standardizes column names
-    - Drops rows missing key identifiers
-    - Parses date robustly
-    - Normalizes state/district strings
-    - Converts age columns to non-negative numeric
-    - Aggregates duplicate (date,state,district) rows by summing age columns
-    - Computes total_enrolments and time dimensions
+    Goal: reduce typo/case/punctuation-driven fragmentation without needing a full
+    external district master list.
+
+    This only merges within the same state, and only when the source district is
+    rare and the best match is both common and highly similar. With a
+    ``dictionary``, known names are looked up instead, so their merges do not
+    depend on this load's occurrence counts; only unseen names are matched.
     """
 
+    out, _ = _canonicalize_districts(
+        df,
+        dictionary,
+        rare_max_occ=rare_max_occ,
+        candidate_min_occ=candidate_min_occ,
+        similarity_threshold=similarity_threshold,
+    )
+    return out
+
+
+def _standardize_and_validate(raw_df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> pd.DataFrame:
     df = _standardize_columns(raw_df)
 
-    missing = REQUIRED_COLS - set(df.columns)
+    missing = {"date", "state", "district", *age_cols} - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
 
-    df = df.copy()
+    return df.copy()
+
+
+def _drop_missing_identifiers(df: pd.DataFrame) -> pd.DataFrame:
+    return df.dropna(subset=["date", "state", "district"])  # type: ignore[arg-type]
+
+
+# Strings ``pd.to_datetime`` skips when inferring a format from the first value
+_UNINFERABLE_DATES = frozenset({"", "NaT", "nat", "NAT", "nan", "NaN", "NAN", "now", "today"})
+
+
+def _parse_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse ``date`` as DD-MM-YYYY, falling back to day-first inference.
 
-    # Basic cleaning
-    df = df.dropna(subset=["date", "state", "district"])  # type: ignore[arg-type]
+    Only the distinct raw strings are parsed (a few hundred days, however many
+    rows), and the fallback only sees the ones the strict pass rejected. The
+    results are mapped back to rows through the factorized codes.
+    """
 
-    # Parse date: DD-MM-YYYY first, then common fallbacks
-    parsed = pd.to_datetime(df["date"], format="%d-%m-%Y", errors="coerce")
-    parsed_fallback = pd.to_datetime(df["date"], errors="coerce", dayfirst=True)
-    df["date"] = parsed.fillna(parsed_fallback)
-    df = df.dropna(subset=["date"])
+    codes, uniques = pd.factorize(df["date"])
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    parsed = pd.to_datetime(uniques, format="%d-%m-%Y", errors="coerce")
+
+    failed = np.flatnonzero(parsed.isna().to_numpy())
+    if len(failed):
+        # Without a format, to_datetime infers one from the first usable value.
+        # Keep the column's first usable value in front so the fallback infers
+        # the same format it would over the whole column.
+        anchor = next(
+            (i for i, v in enumerate(uniques) if not (isinstance(v, str) and v in _UNINFERABLE_DATES)),
+            None,
+        )
+        lookup = failed if anchor is None or anchor in failed else np.concatenate([[anchor], failed])
+        fallback = pd.to_datetime(uniques.iloc[lookup], errors="coerce", dayfirst=True)
+        parsed = parsed.fillna(fallback.iloc[len(lookup) - len(failed):])
+
+    # Missing raw dates have code -1, which picks the trailing NaT
+    values = np.append(parsed.to_numpy(), np.array(["NaT"], dtype=parsed.dtype))
+    df["date"] = pd.Series(values[codes], index=df.index)
+    return df.dropna(subset=["date"])
+
+
+def _normalize_identifiers(df: pd.DataFrame) -> pd.DataFrame:
+    # Normalize each distinct spelling once, then broadcast through the codes
+    for col, normalize in (("state", _normalize_state), ("district", _normalize_district)):
+        codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+        mapped = pd.Series(uniques).map(normalize)
+        df[col] = pd.Series(mapped.to_numpy()[codes], index=df.index, dtype=mapped.dtype)
+    return df
 
-    # Normalize strings
-    df["state"] = df["state"].map(_normalize_state)
-    df["district"] = df["district"].map(_normalize_district)
 
-    # Convert numeric columns (handle commas)
-    for col in AGE_COLS:
+def _coerce_age_counts(df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> pd.DataFrame:
+    # Handle comma-formatted numbers, then clamp negatives
+    for col in age_cols:
         series = df[col]
         if series.dtype == object:
             series = series.astype(str).str.replace(",", "", regex=False)
         df[col] = pd.to_numeric(series, errors="coerce").fillna(0)
 
-    # Clamp negative values
-    for col in AGE_COLS:
+    for col in age_cols:
         df[col] = df[col].clip(lower=0)
+    return df
 
-    # Drop Unknown identifiers
-    df = df[(df["state"] != "Unknown") & (df["district"] != "Unknown")]
 
-    if merge_rare_district_variants:
-        df = _merge_rare_district_variants(
-            df,
-            rare_max_occ=rare_max_occ,
-            candidate_min_occ=candidate_min_occ,
-            similarity_threshold=similarity_threshold,
-        )
+def _drop_unknown_identifiers(df: pd.DataFrame) -> pd.DataFrame:
+    return df[(df["state"] != "Unknown") & (df["district"] != "Unknown")]
+
+
+def _aggregate_duplicates(df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> pd.DataFrame:
+    # Sum age buckets across rows sharing (date, state, district)
+    return df.groupby(["date", "state", "district"], as_index=False)[list(age_cols)].sum()
 
-    # Aggregate duplicates by summing age buckets
-    df = (
-        df.groupby(["date", "state", "district"], as_index=False)[list(AGE_COLS)].sum()
-    )
 
-    # Calculate total
-    df["total_enrolments"] = df[list(AGE_COLS)].sum(axis=1)
+def _add_totals(df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> pd.DataFrame:
+    df["total_enrolments"] = df[list(age_cols)].sum(axis=1)
+    return df[df["total_enrolments"] > 0]
 
-    # Remove zero enrollments
-    df = df[df["total_enrolments"] > 0]
 
-    # Add time dimensions
+def _add_time_dimensions(df: pd.DataFrame) -> pd.DataFrame:
     df["year"] = df["date"].dt.year
     df["month"] = df["date"].dt.strftime("%b %Y")
     df["day_of_week"] = df["date"].dt.day_name()
 
     # Sort for stability
-    df = df.sort_values(["date", "state", "district"], kind="mergesort").reset_index(drop=True)
-
-    return df
+    return df.sort_values(["date", "state", "district"], kind="mergesort").reset_index(drop=True)
 
 
-def clean_dataframe_with_report(
+def clean_dataframe(
     raw_df: pd.DataFrame,
     *,
     merge_rare_district_variants: bool = True,
     rare_max_occ: int = 3,
     candidate_min_occ: int = 8,
     similarity_threshold: float = 0.92,
-) -> tuple[pd.DataFrame, dict]:
-    """Clean the dataset and also return a summary report of what changed.
+    district_dictionary: DistrictDictionary | None = None,
+    age_cols: tuple[str, ...] = AGE_COLS,
+) -> pd.DataFrame:
+    """Logically clean a raw Aadhaar dataset (enrolment by default).
 
-    The report is intended for UI display (high-level quality and reduction stats)
-    and is not meant to be a strict audit log.
+    - Standardizes column names
+    - Drops rows missing key identifiers
+    - Parses date robustly
+    - Normalizes state/district strings
+    - Converts the ``age_cols`` measure columns to non-negative numeric
+    - Maps district variants to canonical names (``district_dictionary`` first)
+    - Aggregates duplicate (date,state,district) rows by summing age columns
+    - Computes total_enrolments (the sum of ``age_cols``) and time dimensions
     """
 
-    report: dict[str, int | float | dict] = {}
-    report["original_records"] = int(len(raw_df))
-    report["exact_duplicates"] = int(raw_df.duplicated().sum())
-
-    df = _standardize_columns(raw_df)
-
-    missing = REQUIRED_COLS - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing required columns: {', '.join(sorted(missing))}")
-
-    df = df.copy()
-
-    # Drop rows missing identifiers
-    before = len(df)
-    df = df.dropna(subset=["date", "state", "district"])  # type: ignore[arg-type]
-    report["missing_required_fields"] = int(before - len(df))
-
-    # Parse date
-    before = len(df)
-    parsed = pd.to_datetime(df["date"], format="%d-%m-%Y", errors="coerce")
-    parsed_fallback = pd.to_datetime(df["date"], errors="coerce", dayfirst=True)
-    df["date"] = parsed.fillna(parsed_fallback)
-    df = df.dropna(subset=["date"])
-    report["invalid_dates"] = int(before - len(df))
-
-    # Normalize strings
-    df["state"] = df["state"].map(_normalize_state)
-    df["district"] = df["district"].map(_normalize_district)
-
-    # Convert numeric columns
-    for col in AGE_COLS:
-        series = df[col]
-        if series.dtype == object:
-            series = series.astype(str).str.replace(",", "", regex=False)
-        df[col] = pd.to_numeric(series, errors="coerce").fillna(0)
-
-    for col in AGE_COLS:
-        df[col] = df[col].clip(lower=0)
-
-    # Drop Unknown identifiers
-    before = len(df)
-    df = df[(df["state"] != "Unknown") & (df["district"] != "Unknown")]
-    report["invalid_identifiers"] = int(before - len(df))
+    df = _standardize_and_validate(raw_df, age_cols)
+    df = _drop_missing_identifiers(df)
+    df = _parse_dates(df)
+    df = _normalize_identifiers(df)
+    df = _coerce_age_counts(df, age_cols)
+    df = _drop_unknown_identifiers(df)
 
     if merge_rare_district_variants:
         df = _merge_rare_district_variants(
@@ -365,28 +347,146 @@ def clean_dataframe_with_report(
             rare_max_occ=rare_max_occ,
             candidate_min_occ=candidate_min_occ,
             similarity_threshold=similarity_threshold,
+            dictionary=district_dictionary,
         )
 
-    # Logical duplicates: multiple rows per (date,state,district)
-    pre_group = len(df)
-    df = df.groupby(["date", "state", "district"], as_index=False)[list(AGE_COLS)].sum()
-    report["logical_duplicates"] = int(pre_group - len(df))
+    df = _aggregate_duplicates(df, age_cols)
+    df = _add_totals(df, age_cols)
+    return _add_time_dimensions(df)
+
+
+class _StageProfiler:
+    """Collects wall time, CPU time and (optionally) traced memory per stage."""
+
+    def __init__(self, track_memory: bool):
+        self.stages: list[dict] = []
+        self.track_memory = track_memory
+        self._owns_tracing = False
+
+    def __enter__(self) -> "_StageProfiler":
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._owns_tracing:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int) -> Iterator[dict]:
+        entry: dict = {"stage": name, "rows_in": int(rows_in)}
+        if self.track_memory:
+            mem_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield entry
+        finally:
+            entry["wall_ms"] = (time.perf_counter() - wall0) * 1e3
+            entry["cpu_ms"] = (time.process_time() - cpu0) * 1e3
+            if self.track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                entry["peak_mem_mb"] = max(0, peak - mem_before) / 1e6
+                entry["mem_delta_mb"] = (current - mem_before) / 1e6
+            self.stages.append(entry)
+
+
+def clean_dataframe_with_report(
+    raw_df: pd.DataFrame,
+    *,
+    merge_rare_district_variants: bool = True,
+    rare_max_occ: int = 3,
+    candidate_min_occ: int = 8,
+    similarity_threshold: float = 0.92,
+    profile_memory: bool = False,
+    district_dictionary: DistrictDictionary | None = None,
+    age_cols: tuple[str, ...] = AGE_COLS,
+) -> tuple[pd.DataFrame, dict]:
+    """Clean the dataset and also return a summary report of what changed.
+
+    The report is intended for UI display (high-level quality and reduction stats)
+    and is not meant to be a strict audit log.
 
-    # Calculate total and drop zeros
-    df["total_enrolments"] = df[list(AGE_COLS)].sum(axis=1)
-    before = len(df)
-    df = df[df["total_enrolments"] > 0]
-    report["zero_enrollments"] = int(before - len(df))
+    ``report["stage_profile"]`` lists each stage with its input/output row
+    counts, wall time and CPU time. With ``profile_memory=True`` each entry also
+    carries the stage's peak and net traced memory (via ``tracemalloc``, which
+    slows cleaning down noticeably).
 
-    # Outliers: not removed by default cleaner
-    report["outliers_removed"] = 0
+    With a ``district_dictionary``, ``report["district_dictionary"]`` gives its
+    revision, entry count and how many (state, district) pairs it did not know.
+    """
 
-    # Time dimensions
-    df["year"] = df["date"].dt.year
-    df["month"] = df["date"].dt.strftime("%b %Y")
-    df["day_of_week"] = df["date"].dt.day_name()
+    report: dict[str, int | float | dict | list] = {}
+    report["original_records"] = int(len(raw_df))
 
-    df = df.sort_values(["date", "state", "district"], kind="mergesort").reset_index(drop=True)
+    with _StageProfiler(profile_memory) as prof:
+        with prof.stage("exact_duplicates", len(raw_df)) as st:
+            report["exact_duplicates"] = int(raw_df.duplicated().sum())
+            st["rows_out"] = len(raw_df)
+
+        with prof.stage("standardize", len(raw_df)) as st:
+            df = _standardize_and_validate(raw_df, age_cols)
+            st["rows_out"] = len(df)
+
+        with prof.stage("dropna", len(df)) as st:
+            df = _drop_missing_identifiers(df)
+            st["rows_out"] = len(df)
+        report["missing_required_fields"] = int(st["rows_in"] - st["rows_out"])
+
+        with prof.stage("parse_dates", len(df)) as st:
+            df = _parse_dates(df)
+            st["rows_out"] = len(df)
+        report["invalid_dates"] = int(st["rows_in"] - st["rows_out"])
+
+        with prof.stage("normalize", len(df)) as st:
+            df = _normalize_identifiers(df)
+            st["rows_out"] = len(df)
+
+        with prof.stage("coerce_counts", len(df)) as st:
+            df = _coerce_age_counts(df, age_cols)
+            st["rows_out"] = len(df)
+
+        with prof.stage("drop_unknown", len(df)) as st:
+            df = _drop_unknown_identifiers(df)
+            st["rows_out"] = len(df)
+        report["invalid_identifiers"] = int(st["rows_in"] - st["rows_out"])
+
+        if merge_rare_district_variants:
+            with prof.stage("merge_variants", len(df)) as st:
+                df, mapping = _canonicalize_districts(
+                    df,
+                    district_dictionary,
+                    rare_max_occ=rare_max_occ,
+                    candidate_min_occ=candidate_min_occ,
+                    similarity_threshold=similarity_threshold,
+                )
+                st["rows_out"] = len(df)
+            if district_dictionary is not None:
+                report["district_dictionary"] = {
+                    "revision": district_dictionary.revision,
+                    "entries": len(district_dictionary.index),
+                    "unseen": sum(1 for k in mapping if k not in district_dictionary.index),
+                }
+
+        # Logical duplicates: multiple rows per (date,state,district)
+        with prof.stage("group_by", len(df)) as st:
+            df = _aggregate_duplicates(df, age_cols)
+            st["rows_out"] = len(df)
+        report["logical_duplicates"] = int(st["rows_in"] - st["rows_out"])
+
+        with prof.stage("totals", len(df)) as st:
+            df = _add_totals(df, age_cols)
+            st["rows_out"] = len(df)
+        report["zero_enrollments"] = int(st["rows_in"] - st["rows_out"])
+
+        # Outliers: not removed by default cleaner
+        report["outliers_removed"] = 0
+
+        with prof.stage("time_dims", len(df)) as st:
+            df = _add_time_dimensions(df)
+            st["rows_out"] = len(df)
 
     report["final_clean_records"] = int(len(df))
     report["states"] = int(df["state"].nunique())
@@ -395,9 +495,43 @@ def clean_dataframe_with_report(
     orig = int(report["original_records"]) or 1
     report["data_quality_score_pct"] = float(report["final_clean_records"]) / orig * 100.0
 
+    report["stage_profile"] = prof.stages
+    report["profile_total_wall_ms"] = sum(st["wall_ms"] for st in prof.stages)
+
     return df, dict(report)
 
 
+def learn_district_dictionary(
+    raw_df: pd.DataFrame,
+    dictionary: DistrictDictionary | None = None,
+    *,
+    rare_max_occ: int = 3,
+    candidate_min_occ: int = 8,
+    similarity_threshold: float = 0.92,
+    age_cols: tuple[str, ...] = AGE_COLS,
+) -> DistrictDictionary:
+    """Resolve the districts in ``raw_df`` and add unseen ones to ``dictionary``.
+
+    Entries already in the dictionary are kept as they are.
+    """
+
+    df = _standardize_and_validate(raw_df, age_cols)
+    df = _drop_missing_identifiers(df)
+    df = _parse_dates(df)
+    df = _normalize_identifiers(df)
+    df = _drop_unknown_identifiers(df)
+
+    dictionary = dictionary or DistrictDictionary()
+    _, mapping = _canonicalize_districts(
+        df,
+        dictionary,
+        rare_max_occ=rare_max_occ,
+        candidate_min_occ=candidate_min_occ,
+        similarity_threshold=similarity_threshold,
+    )
+    return dictionary.learned(mapping)
+
+
 def filter_df(
     source: pd.DataFrame,
     *,
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+try:
+    from backend.metrics import record_cache
+except ModuleNotFoundError:
+    from metrics import record_cache
+
+# Preferred first; brotli is only offered when the package is installed
+ENCODINGS: tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Best supported encoding allowed by an ``Accept-Encoding`` header, or None.
+
+    Codings with ``q=0`` are refused; otherwise server preference wins, as
+    browsers send equal weights for gzip and br.
+    """
+
+    if not accept_encoding:
+        return None
+    allowed: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        allowed[name.strip().lower()] = q
+
+    for encoding in ENCODINGS:
+        q = allowed.get(encoding, allowed.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        # Quality 5 compresses about as fast as gzip -6 and noticeably smaller
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def minimum_size_from_env() -> int:
+    return max(0, int(os.environ.get("UIDAI_COMPRESS_MIN_BYTES", 1024)))
+
+
+class CompressionMiddleware:
+    """ASGI middleware that gzip/brotli-compresses JSON and text responses.
+
+    Bodies smaller than ``minimum_size`` are sent as is, since headers and
+    framing outweigh the savings. Responses that already carry a
+    ``Content-Encoding`` (the precompressed bodies of ``ResponseCache``) and
+    streamed responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: dict | None = None
+        passthrough = False
+
+        async def _send(message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(start, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            response_headers = [
+                (k, v) for k, v in start["headers"] if k.lower() not in {b"content-length", b"vary"}
+            ]
+            vary = [v for k, v in start["headers"] if k.lower() == b"vary"]
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b", ".join([*vary, b"Accept-Encoding"])),
+            ]
+            await send({**start, "headers": response_headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, _send)
+
+    def _compressible(self, start: dict, body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        headers = {k.lower(): v for k, v in start["headers"]}
+        if b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+
+class CachedBody:
+    """One encoded JSON response: identity bytes plus compressed variants made on demand."""
+
+    def __init__(self, body: bytes):
+        self.variants: dict[str | None, bytes] = {None: body}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(v) for v in self.variants.values())
+
+
+class ResponseCache:
+    """LRU cache of encoded response bodies, bounded by total bytes.
+
+    Each entry keeps the JSON bytes and every compressed variant requested so
+    far, so a repeat request skips both encoding and compression. Each loaded
+    dataset gets its own cache, so a reload starts empty. Lookups report to
+    the ``response`` cache metrics.
+    """
+
+    def __init__(self, max_bytes: int, minimum_size: int = 1024):
+        self.max_bytes = max(0, int(max_bytes))
+        self.minimum_size = minimum_size
+        self.nbytes = 0
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            max_bytes=float(os.environ.get("UIDAI_RESPONSE_CACHE_MB", 64)) * 1024 * 1024,
+            minimum_size=minimum_size_from_env(),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def content_encoding(self, body: bytes, encoding: str | None) -> str | None:
+        """The encoding to send ``body`` with: none below ``minimum_size``."""
+
+        return encoding if len(body) >= self.minimum_size else None
+
+    def get(self, key: Hashable, encoding: str | None) -> tuple[bytes, str | None] | None:
+        """Cached ``(body, content_encoding)`` if that variant is already stored."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            encoding = self.content_encoding(entry.variants[None], encoding)
+            body = entry.variants.get(encoding)
+            if body is None:
+                return None
+            self._entries.move_to_end(key)
+        record_cache("response", True)
+        return body, encoding
+
+    def body(self, key: Hashable) -> bytes | None:
+        """Cached JSON bytes for ``key``, so only compression is left to do."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+        record_cache("response", entry is not None)
+        return entry.variants[None] if entry is not None else None
+
+    def put(self, key: Hashable, body: bytes, encoding: str | None) -> tuple[bytes, str | None]:
+        """Encode ``body`` for the client and cache it."""
+
+        encoding = self.content_encoding(body, encoding)
+        out = body if encoding is None else compress(body, encoding)
+
+        with self._lock:
+            if not self.enabled:
+                return out, encoding
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CachedBody(body)
+            else:
+                self.nbytes -= entry.nbytes
+            entry.variants.setdefault(encoding, out)
+            self.nbytes += entry.nbytes
+            self._entries.move_to_end(key)
+            self._evict()
+        return out, encoding
+
+    def _evict(self) -> None:
+        while self.nbytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.nbytes -= entry.nbytes
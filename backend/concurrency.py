@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    """Raised when the worker pool's queue is full and the request is shed."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Server busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    """Bounded executor for CPU-heavy aggregations.
+
+    Work runs on a dedicated thread pool rather than Starlette's shared
+    threadpool, so a burst of expensive queries cannot take every thread, and
+    the bounded queue caps how much work can pile up. The threads still share
+    the GIL with the event loop: numeric NumPy kernels release it, but regex
+    search filters, groupbys on string keys, ``to_dict("records")`` and JSON
+    encoding hold it. Under heavy concurrent load, cheap event-loop endpoints
+    therefore slow down (several-fold at p90) rather than stall. Set
+    ``UIDAI_SHARDS`` to run query aggregations in worker processes instead.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more may
+    wait; anything beyond that is rejected immediately with ``Overloaded``.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int = 1):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = max(1, int(retry_after))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="uidai-agg")
+        # Only touched from the event loop thread, so no lock is needed.
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls) -> "WorkerPool":
+        return cls(
+            max_workers=int(os.environ.get("UIDAI_WORKERS", min(4, os.cpu_count() or 1))),
+            max_queue=int(os.environ.get("UIDAI_MAX_QUEUE", 32)),
+            retry_after=int(os.environ.get("UIDAI_RETRY_AFTER", 1)),
+        )
+
+    @property
+    def pending(self) -> int:
+        """Calls currently running or waiting for a worker."""
+
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._pending >= self.max_workers + self.max_queue:
+            raise Overloaded(self.retry_after)
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Carry the caller's context (request metrics) into the worker thread
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(ctx.run, fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.cleaning import AGE_COLS
+    from backend.compression import ResponseCache
+    from backend.districts import DistrictDictionary
+    from backend.query import QueryEngine
+    from backend.serving import ServingDataset, read_artifact
+    from backend.sharding import ShardedQueryEngine, shards_from_env
+    from backend.stats import DatasetStats
+except ModuleNotFoundError:
+    from cleaning import AGE_COLS
+    from compression import ResponseCache
+    from districts import DistrictDictionary
+    from query import QueryEngine
+    from serving import ServingDataset, read_artifact
+    from sharding import ShardedQueryEngine, shards_from_env
+    from stats import DatasetStats
+
+DATA_DIR = Path(__file__).resolve().parent / ".." / "data"
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """One UIDAI feed: where its files live and which columns it measures.
+
+    Every feed is keyed by date, state and district; ``age_cols`` are its
+    count columns, which become the query engine's metrics and ``age_groups``.
+    Cleaned frames always carry ``total_enrolments``, the sum of ``age_cols``.
+    """
+
+    name: str
+    title: str
+    age_cols: tuple[str, ...]
+    csv_name: str
+    artifact_name: str
+    csv_env: str
+    artifact_env: str
+
+    def csv_path(self) -> Path:
+        return Path(os.environ.get(self.csv_env) or DATA_DIR / self.csv_name).resolve()
+
+    def artifact_path(self) -> Path:
+        return Path(os.environ.get(self.artifact_env) or DATA_DIR / self.artifact_name).resolve()
+
+
+DATASETS: dict[str, DatasetSchema] = {
+    schema.name: schema
+    for schema in (
+        DatasetSchema(
+            name="enrolment",
+            title="Aadhaar enrolment",
+            age_cols=AGE_COLS,
+            csv_name="api_data_aadhar_enrolment.csv",
+            artifact_name="serving.pkl",
+            csv_env="UIDAI_DATA_CSV",
+            artifact_env="UIDAI_ARTIFACT",
+        ),
+        DatasetSchema(
+            name="demographic",
+            title="Aadhaar demographic updates",
+            age_cols=("demo_age_5_17", "demo_age_17_"),
+            csv_name="api_data_aadhar_demographic.csv",
+            artifact_name="serving.demographic.pkl",
+            csv_env="UIDAI_DEMOGRAPHIC_CSV",
+            artifact_env="UIDAI_DEMOGRAPHIC_ARTIFACT",
+        ),
+        DatasetSchema(
+            name="biometric",
+            title="Aadhaar biometric updates",
+            age_cols=("bio_age_5_17", "bio_age_17_"),
+            csv_name="api_data_aadhar_biometric.csv",
+            artifact_name="serving.biometric.pkl",
+            csv_env="UIDAI_BIOMETRIC_CSV",
+            artifact_env="UIDAI_BIOMETRIC_ARTIFACT",
+        ),
+    )
+}
+DEFAULT_DATASET = "enrolment"
+
+
+def dictionary_path() -> Path:
+    # Districts are the same across feeds, so they share one dictionary
+    return Path(os.environ.get("UIDAI_DISTRICT_DICTIONARY") or DATA_DIR / "district_dictionary.json").resolve()
+
+
+@dataclass
+class LoadedDataset:
+    """A dataset ready to serve, with its own query engine and response cache.
+
+    When sharded, the cleaned frame lives only in the shard processes and
+    ``df`` is None; use ``rows``, ``stats`` and ``sample_rows`` instead.
+    """
+
+    schema: DatasetSchema
+    serving: ServingDataset
+    query_engine: QueryEngine | ShardedQueryEngine
+    response_cache: ResponseCache
+    load_info: dict
+    nbytes: int
+    # Position of each state's first row in the cleaned frame, ascending
+    first_rows: np.ndarray
+
+    @property
+    def df(self) -> pd.DataFrame | None:
+        return self.serving.df
+
+    @property
+    def rows(self) -> int:
+        return self.stats.total_records
+
+    @property
+    def cleaning_report(self) -> dict:
+        return self.serving.cleaning_report
+
+    @property
+    def stats(self) -> DatasetStats:
+        return self.serving.stats
+
+    @property
+    def age_cols(self) -> tuple[str, ...]:
+        return self.schema.age_cols
+
+    def sample_rows(self, limit: int) -> pd.DataFrame:
+        """Up to ``limit`` rows for charts: each state's first row, then a seeded random sample.
+
+        All rows are returned when ``limit`` covers them, and every state's
+        first row even when there are more states than ``limit``.
+        """
+
+        n = min(limit, self.rows)
+        if n >= self.rows:
+            positions = np.arange(self.rows)
+        else:
+            positions = self.first_rows
+            remaining = n - len(self.first_rows)
+            if remaining > 0:
+                rest = pd.RangeIndex(self.rows).drop(self.first_rows).to_series()
+                picked = rest.sample(n=min(remaining, len(rest)), random_state=42).to_numpy()
+                positions = np.concatenate([positions, picked])
+
+        if isinstance(self.query_engine, ShardedQueryEngine):
+            return self.query_engine.take(positions)
+        return self.df.take(positions).reset_index(drop=True)
+
+    def close(self) -> None:
+        if isinstance(self.query_engine, ShardedQueryEngine):
+            self.query_engine.close()
+
+
+def load_dataset(schema: DatasetSchema, *, started: float | None = None) -> LoadedDataset:
+    """Load ``schema``'s prebuilt artifact when it matches the CSV, otherwise read and clean the CSV."""
+
+    t0 = time.perf_counter()
+    csv_path, artifact_path, dict_path = schema.csv_path(), schema.artifact_path(), dictionary_path()
+    # UIDAI_SHARDS=N answers queries from N state-partitioned worker processes,
+    # which hold the rows and build their own engines; this process keeps neither
+    shards = shards_from_env()
+    dataset = None
+    source = "csv"
+    if artifact_path.exists():
+        try:
+            dataset = read_artifact(artifact_path, source=csv_path, dictionary=dict_path)
+            if dataset.query_engine.age_cols != schema.age_cols:
+                raise ValueError(f"{artifact_path.name} does not hold the {schema.name} dataset")
+            source = "artifact"
+            print(f"Loaded serving artifact {artifact_path.name}")
+            if shards > 1:
+                dataset = replace(dataset, query_engine=None)
+        except Exception as e:
+            dataset = None
+            print(f"Ignoring serving artifact: {e}")
+
+    if dataset is None:
+        print(f"Loading {schema.title} data...")
+        # Stage timings are always reported; UIDAI_PROFILE_CLEANING=1 adds traced memory
+        profile_memory = os.environ.get("UIDAI_PROFILE_CLEANING", "").lower() in {"1", "true", "yes"}
+        # Known district variants come from the persisted dictionary when present
+        dictionary = DistrictDictionary.load(dict_path) if dict_path.exists() else None
+        dataset = ServingDataset.from_csv(
+            csv_path,
+            profile_memory=profile_memory,
+            district_dictionary=dictionary,
+            age_cols=schema.age_cols,
+            build_query_engine=shards <= 1,
+        )
+
+    first_rows = np.flatnonzero(~dataset.df["state"].duplicated().to_numpy())
+    sharded = None
+    if shards > 1:
+        sharded = ShardedQueryEngine.from_frame(dataset.df, shards, schema.age_cols)
+        sharded.warm_up()
+        # Stats and the cleaning report were computed at load; the shards hold the rows
+        dataset = replace(dataset, df=None)
+
+    load_info = {
+        "dataset": schema.name,
+        "source": source,
+        "shards": len(sharded.rows) if sharded is not None else 1,
+        "load_seconds": round(time.perf_counter() - t0, 4),
+    }
+    if started is not None:
+        load_info["ready_after_import_seconds"] = round(time.perf_counter() - started, 4)
+    rows = dataset.stats.total_records
+    print(f"Cleaned {schema.name} data: {rows} rows ({source}, {load_info['load_seconds']:.2f}s)")
+
+    return LoadedDataset(
+        schema=schema,
+        serving=dataset,
+        query_engine=sharded or dataset.query_engine,
+        response_cache=ResponseCache.from_env(),
+        load_info=load_info,
+        nbytes=dataset.nbytes + first_rows.nbytes + (sharded.nbytes if sharded is not None else 0),
+        first_rows=first_rows,
+    )
+
+
+class DatasetRegistry:
+    """Loads datasets on first use and keeps them within a memory budget.
+
+    Each dataset loads at most once at a time; different datasets may load
+    concurrently. When the loaded datasets' estimated size exceeds
+    ``memory_budget`` bytes, the least recently used ones (never the one just
+    loaded) are dropped, and load again on their next request. Requests
+    already holding an evicted dataset finish with it. A budget of 0 means no
+    limit.
+    """
+
+    def __init__(self, schemas: dict[str, DatasetSchema], memory_budget: int = 0, started: float | None = None):
+        self.schemas = schemas
+        self.memory_budget = max(0, int(memory_budget))
+        # perf_counter() at import, reported with the first load
+        self.started = started
+        self.errors: dict[str, Exception] = {}
+        self.evictions = 0
+        self._loaded: OrderedDict[str, LoadedDataset] = OrderedDict()
+        self._loading: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, started: float | None = None) -> "DatasetRegistry":
+        budget_mb = float(os.environ.get("UIDAI_MEMORY_BUDGET_MB", 2048))
+        return cls(dict(DATASETS), memory_budget=int(budget_mb * 1024 * 1024), started=started)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(d.nbytes for d in list(self._loaded.values()))
+
+    def loaded(self) -> list[LoadedDataset]:
+        with self._lock:
+            return list(self._loaded.values())
+
+    def peek(self, name: str) -> LoadedDataset | None:
+        """The dataset if it is loaded, without loading it."""
+
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is not None:
+                self._loaded.move_to_end(name)
+            return loaded
+
+    def is_loading(self, name: str) -> bool:
+        lock = self._loading.get(name)
+        return lock is not None and lock.locked()
+
+    def get(self, name: str) -> LoadedDataset:
+        """The loaded dataset, loading it first if needed. ``KeyError`` for unknown names."""
+
+        schema = self.schemas[name]
+        loaded = self.peek(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            lock = self._loading.setdefault(name, threading.Lock())
+        with lock:
+            loaded = self.peek(name)
+            if loaded is None:
+                loaded = self._load(schema)
+        return loaded
+
+    def reload(self, name: str) -> LoadedDataset:
+        """Load ``name`` again from disk and replace the served copy."""
+
+        schema = self.schemas[name]
+        with self._lock:
+            lock = self._loading.setdefault(name, threading.Lock())
+        with lock:
+            return self._load(schema)
+
+    def _load(self, schema: DatasetSchema) -> LoadedDataset:
+        try:
+            loaded = load_dataset(schema, started=self.started)
+        except Exception as e:
+            self.errors[schema.name] = e
+            raise
+        self.errors.pop(schema.name, None)
+        # Only the first load reports time since import
+        self.started = None
+
+        with self._lock:
+            # A reload replaces the served copy; requests using the old one finish with it
+            self._loaded.pop(schema.name, None)
+            self._loaded[schema.name] = loaded
+            evicted = self._evict(keep=schema.name)
+        for dataset in evicted:
+            print(f"Evicted {dataset.schema.name} data ({dataset.nbytes / 2**20:.1f} MB)")
+        return loaded
+
+    def _evict(self, keep: str) -> list[LoadedDataset]:
+        evicted = []
+        while self.memory_budget and len(self._loaded) > 1 and self.nbytes > self.memory_budget:
+            name = next(n for n in self._loaded if n != keep)
+            evicted.append(self._loaded.pop(name))
+            self.evictions += 1
+        return evicted
+
+    def status(self) -> list[dict]:
+        with self._lock:
+            loaded = dict(self._loaded)
+        out = []
+        for name, schema in self.schemas.items():
+            entry = {"name": name, "title": schema.title, "age_groups": list(schema.age_cols)}
+            if name in loaded:
+                entry.update(state="loaded", rows=loaded[name].rows, memory_mb=round(loaded[name].nbytes / 2**20, 1))
+            elif self.is_loading(name):
+                entry["state"] = "loading"
+            elif name in self.errors:
+                entry.update(state="error", error=str(self.errors[name]))
+            else:
+                entry["state"] = "unloaded"
+            out.append(entry)
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            loaded = list(self._loaded.values())
+            self._loaded.clear()
+        for dataset in loaded:
+            dataset.close()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+
+# Bump when the dictionary file layout changes
+DICTIONARY_VERSION = 1
+
+
+def _district_tokens(name: str) -> set[str]:
+    parts = re.split(r"[\s\-]+", name.lower().strip())
+    return {p for p in parts if p and p not in {"and", "of", "the"}}
+
+
+def _district_similarity(a: str, b: str, a_tok: set[str], b_tok: set[str]) -> float | None:
+    """Character similarity of two district names, or None without enough shared tokens."""
+
+    union = len(a_tok | b_tok)
+    jacc = (len(a_tok & b_tok) / union) if union else 0.0
+
+    # Guardrail: require meaningful token overlap
+    if jacc < 0.5:
+        return None
+
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+@dataclass
+class DistrictDictionary:
+    """Persisted (state, normalized district) -> canonical district mapping.
+
+    The file is JSON, grouped by state so it diffs and reviews well::
+
+        {"version": 1, "revision": 3, "districts": {"Odisha": {"Anugul": "Angul", ...}}}
+
+    Every district the cleaner has seen has an entry, canonical names mapping
+    to themselves, so a name missing from ``index`` is genuinely new.
+    ``revision`` increases each time learned entries are added.
+    """
+
+    index: dict[tuple[str, str], str] = field(default_factory=dict)
+    revision: int = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "DistrictDictionary":
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        if payload.get("version") != DICTIONARY_VERSION:
+            raise ValueError(f"{path} is not a version {DICTIONARY_VERSION} district dictionary")
+        index = {
+            (state, name): canonical
+            for state, names in payload.get("districts", {}).items()
+            for name, canonical in names.items()
+        }
+        return cls(index=index, revision=int(payload.get("revision", 0)))
+
+    def save(self, path: Path) -> None:
+        districts: dict[str, dict[str, str]] = {}
+        for (state, name), canonical in sorted(self.index.items()):
+            districts.setdefault(state, {})[name] = canonical
+        payload = {"version": DICTIONARY_VERSION, "revision": self.revision, "districts": districts}
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    def learned(self, mapping: dict[tuple[str, str], str]) -> "DistrictDictionary":
+        """A new revision with ``mapping``'s unseen entries added; known entries never change."""
+
+        new = {k: v for k, v in mapping.items() if k not in self.index}
+        if not new:
+            return self
+        return DistrictDictionary(index={**self.index, **new}, revision=self.revision + 1)
+
+    def canonical_names(self) -> dict[str, list[str]]:
+        by_state: dict[str, set[str]] = {}
+        for (state, _), canonical in self.index.items():
+            by_state.setdefault(state, set()).add(canonical)
+        return {state: sorted(names) for state, names in by_state.items()}
+
+
+def resolve_districts(
+    states: list[str],
+    names: list[str],
+    occurrences: np.ndarray,
+    dictionary: DistrictDictionary,
+    *,
+    rare_max_occ: int,
+    candidate_min_occ: int,
+    similarity_threshold: float,
+) -> list[str]:
+    """Canonical district for each unique ``(states[i], names[i])`` pair.
+
+    Known pairs are a dictionary lookup. An unseen pair keeps its name unless
+    it is rare (at most ``rare_max_occ`` rows) and highly similar to a
+    candidate in the same state: a district common in this data (at least
+    ``candidate_min_occ`` rows) or a canonical name from the dictionary. With
+    an empty dictionary this is exactly the rare-variant merge.
+    """
+
+    known = dictionary.canonical_names()
+
+    # Candidates per state: common names in first-seen order, then canonical
+    # names from the dictionary, so ties break as the plain merge does
+    candidates: dict[str, list[str]] = {}
+    for state, name, n in zip(states, names, occurrences):
+        if n >= candidate_min_occ:
+            candidates.setdefault(state, []).append(name)
+    for state, names_ in known.items():
+        listed = candidates.setdefault(state, [])
+        seen = set(listed)
+        listed.extend(c for c in names_ if c not in seen)
+
+    tokens: dict[str, set[str]] = {}
+
+    def _tok(name: str) -> set[str]:
+        if name not in tokens:
+            tokens[name] = _district_tokens(name)
+        return tokens[name]
+
+    out = []
+    for state, name, n in zip(states, names, occurrences):
+        canonical = dictionary.index.get((state, name))
+        if canonical is not None:
+            out.append(canonical)
+            continue
+
+        state_candidates = candidates.get(state, [])
+        best = None
+        if n <= rare_max_occ and len(state_candidates) >= 2 and _tok(name):
+            best_score = 0.0
+            for c in state_candidates:
+                if c == name:
+                    continue
+                score = _district_similarity(name, c, _tok(name), _tok(c))
+                if score is not None and score > best_score:
+                    best_score = score
+                    best = c
+            if best_score < similarity_threshold:
+                best = None
+
+        # A common name chosen as target may itself be a known variant
+        out.append(dictionary.index.get((state, best), best) if best else name)
+    return out
@@ -1,16 +1,48 @@
-from fastapi import FastAPI, HTTPException, Query
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field
+import asyncio
+import datetime as dt
+import numpy as np
+import os
 import pandas as pd
-from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import Literal
 
 try:
     # When launched as a module: `uvicorn backend.main:app`
-    from backend.cleaning import clean_dataframe, clean_dataframe_with_report, filter_df
+    from backend.compression import CompressionMiddleware, choose_encoding, minimum_size_from_env
+    from backend.concurrency import Overloaded, WorkerPool
+    from backend.datasets import DEFAULT_DATASET, DatasetRegistry, LoadedDataset
+    from backend.metrics import MetricsMiddleware, SlowRequestProfiler, phase, registry as metrics_registry
+    from backend.query import QueryContext, QueryFilters, QuerySort, QuerySpec, select_age_groups
 except ModuleNotFoundError:
     # When launched as a script: `python backend/main.py`
-    from cleaning import clean_dataframe, clean_dataframe_with_report, filter_df
+    from compression import CompressionMiddleware, choose_encoding, minimum_size_from_env
+    from concurrency import Overloaded, WorkerPool
+    from datasets import DEFAULT_DATASET, DatasetRegistry, LoadedDataset
+    from metrics import MetricsMiddleware, SlowRequestProfiler, phase, registry as metrics_registry
+    from query import QueryContext, QueryFilters, QuerySort, QuerySpec, select_age_groups
+
 
-app = FastAPI()
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Start loading the default dataset in the background so the server
+    # accepts connections (and answers /api/ready) immediately; data endpoints
+    # wait for it on demand. Runtimes that skip lifespan events still load on
+    # the first request, and other datasets always load on first use.
+    if os.environ.get("UIDAI_PRELOAD", "1").lower() not in {"0", "false", "no"}:
+        asyncio.get_running_loop().run_in_executor(None, _preload)
+    yield
+    datasets.close()
+
+
+app = FastAPI(lifespan=_lifespan)
 
 # Enable CORS for React frontend
 app.add_middleware(
@@ -26,102 +58,298 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def _clean_dataframe(raw_df: pd.DataFrame) -> pd.DataFrame:
+# CPU-heavy aggregations run here; cheap endpoints stay on the event loop
+worker_pool = WorkerPool.from_env()
+
+# gzip/brotli for bodies over UIDAI_COMPRESS_MIN_BYTES; added first so metrics see the sent size
+app.add_middleware(CompressionMiddleware, minimum_size=minimum_size_from_env())
+
+# Datasets by name, loaded on first use and evicted beyond UIDAI_MEMORY_BUDGET_MB
+datasets = DatasetRegistry.from_env(started=_IMPORT_STARTED)
+
+# Request metrics for /metrics; UIDAI_SLOW_REQUEST_MS enables the sampling profiler
+_slow_ms = os.environ.get("UIDAI_SLOW_REQUEST_MS")
+slow_request_profiler = (
+    SlowRequestProfiler(float(_slow_ms), interval_ms=float(os.environ.get("UIDAI_PROFILE_INTERVAL_MS", 5)))
+    if _slow_ms
+    else None
+)
+app.add_middleware(MetricsMiddleware, profiler=slow_request_profiler)
+metrics_registry.gauge_fn(
+    "uidai_worker_pool_pending", "Aggregation calls running or queued on the worker pool.", lambda: worker_pool.pending
+)
+metrics_registry.gauge_fn(
+    "uidai_response_cache_bytes",
+    "Bytes held by the encoded response caches of loaded datasets.",
+    lambda: sum(d.response_cache.nbytes for d in datasets.loaded()),
+)
+metrics_registry.gauge_fn(
+    "uidai_datasets_loaded_bytes", "Estimated memory of loaded datasets.", lambda: datasets.nbytes
+)
+metrics_registry.gauge_fn(
+    "uidai_dataset_evictions", "Datasets evicted to stay within the memory budget.", lambda: datasets.evictions
+)
+
+
+async def _cache_key(request: Request) -> tuple[str, str, tuple, bytes]:
+    params = tuple(sorted(request.query_params.multi_items(), key=lambda kv: kv[0]))
+    body = await request.body() if request.method == "POST" else b""
+    return request.method, request.url.path, params, body
+
+
+def _encoded_response(body: bytes, encoding: str | None) -> Response:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def _offload(request: Request, ds: LoadedDataset, fn, *args, **kwargs) -> Response:
+    """Run ``fn`` on the worker pool and JSON-encode and compress its result there too.
+
+    The encoded bytes are cached in the dataset's response cache by method,
+    path, query and body, so a repeat request is answered on the event loop
+    without touching the pool. Sheds load with 503 + Retry-After when the
+    pool's queue is full.
+    """
+
+    response_cache = ds.response_cache
+    key = await _cache_key(request)
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    hit = response_cache.get(key, encoding)
+    if hit is not None:
+        return _encoded_response(*hit)
+
+    def _call() -> Response:
+        body = response_cache.body(key)
+        if body is None:
+            payload = fn(*args, **kwargs)
+            with phase("serialize"):
+                body = JSONResponse(payload).body
+        with phase("compress"):
+            return _encoded_response(*response_cache.put(key, body, encoding))
+
     try:
-        return clean_dataframe(raw_df)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return await worker_pool.run(_call)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def _load_default_dataset() -> LoadedDataset:
+    """Load the default dataset again from disk."""
+
+    return datasets.reload(DEFAULT_DATASET)
+
+
+def _preload() -> None:
+    try:
+        datasets.get(DEFAULT_DATASET)
+    except Exception as e:
+        # Recorded in datasets.errors for /api/ready; the next request retries
+        print(f"Dataset failed to load: {e}")
+
+
+async def _dataset(
+    dataset: str = Query(default=DEFAULT_DATASET, description="Dataset to query, see /api/datasets"),
+) -> LoadedDataset:
+    """Resolve the ``dataset`` query parameter, loading the dataset on first use."""
+
+    if dataset not in datasets.schemas:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    loaded = datasets.peek(dataset)
+    if loaded is not None:
+        return loaded
+    try:
+        return await asyncio.to_thread(datasets.get, dataset)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Dataset failed to load: {e}")
+
+
+# Endpoints that serve a dataset; /api/ready, /api/datasets and /metrics stay on ``app``
+api = APIRouter()
+
+
+@app.get("/api/ready")
+async def get_ready(dataset: str = DEFAULT_DATASET):
+    """Readiness probe: 200 once the dataset is loaded, 503 while loading or after a failure."""
+
+    if dataset not in datasets.schemas:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    loaded = datasets.peek(dataset)
+    if loaded is not None:
+        return {"ready": True, "rows": loaded.rows, **loaded.load_info}
+    body = {"ready": False, "loading": datasets.is_loading(dataset)}
+    if dataset in datasets.errors:
+        body["error"] = str(datasets.errors[dataset])
+    return JSONResponse(body, status_code=503)
+
+
+@app.get("/api/datasets")
+async def get_datasets():
+    """Known datasets with their age groups and load state."""
+
+    return {
+        "default": DEFAULT_DATASET,
+        "memory_budget_mb": round(datasets.memory_budget / 2**20, 1),
+        "datasets": datasets.status(),
+    }
+
+
+@api.get("/")
+async def read_root(ds: LoadedDataset = Depends(_dataset)):
+    return {"message": "Aadhaar Dashboard API", "rows": ds.rows}
 
 
-def _load_default_dataframe() -> pd.DataFrame:
-    print("Loading Aadhaar enrollment data...")
-    csv_path = (Path(__file__).resolve().parent / ".." / "data" / "api_data_aadhar_enrolment.csv").resolve()
-    raw = pd.read_csv(csv_path)
-    print(f"Loaded {len(raw)} rows")
-    cleaned, report = clean_dataframe_with_report(raw)
-    global cleaning_report
-    cleaning_report = report
-    print(f"Cleaned data: {len(cleaned)} rows")
-    return cleaned
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, phase, cache and pool metrics."""
 
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-# Current dataset used by API endpoints
-cleaning_report: dict | None = None
-df = _load_default_dataframe()
 
-@app.get("/")
-def read_root():
-    return {"message": "Aadhaar Dashboard API", "rows": len(df)}
+@app.get("/metrics/slow_requests")
+async def get_slow_requests():
+    """Most recent sampled stacks of requests over ``UIDAI_SLOW_REQUEST_MS``."""
 
-@app.get("/api/data")
-def get_data(limit: int = 10000):
+    if slow_request_profiler is None:
+        return {"enabled": False, "requests": []}
+    return {
+        "enabled": True,
+        "threshold_ms": slow_request_profiler.threshold_s * 1000.0,
+        "requests": list(slow_request_profiler.recent),
+    }
+
+@api.get("/api/data")
+async def get_data(request: Request, limit: int = 10000, ds: LoadedDataset = Depends(_dataset)):
     """Get enrollment data with optional limit"""
-    limit = max(1, int(limit))
-    n = min(limit, len(df))
+    return await _offload(request, ds, _data_payload, ds, limit)
 
+
+def _data_payload(ds: LoadedDataset, limit: int) -> dict:
     # Sample for performance, but try to include coverage across states
-    if n >= len(df):
-        sample_df = df
-    else:
-        per_state = df.groupby("state", sort=False).head(1)
-        remaining = max(0, n - len(per_state))
+    with phase("filter"):
+        sample_df = ds.sample_rows(max(1, int(limit)))
+
+    with phase("serialize"):
+        # Convert to JSON-friendly format
+        data = sample_df.to_dict('records')
+
+        # Convert dates to strings
+        for row in data:
+            row['date'] = row['date'].strftime('%Y-%m-%d')
 
-        if remaining > 0:
-            rest = df.drop(index=per_state.index, errors="ignore").sample(
-                n=min(remaining, max(0, len(df) - len(per_state))),
-                random_state=42,
-            )
-            sample_df = pd.concat([per_state, rest], ignore_index=True)
-        else:
-            sample_df = per_state
-    
-    # Convert to JSON-friendly format
-    data = sample_df.to_dict('records')
-    
-    # Convert dates to strings
-    for row in data:
-        row['date'] = row['date'].strftime('%Y-%m-%d')
-    
     return {
         "data": data,
-        "total_rows": len(df),
+        "total_rows": ds.rows,
         "sampled_rows": len(data)
     }
 
-@app.get("/api/summary")
-def get_summary(
+@api.get("/api/summary")
+async def get_summary(
     district_min_total: int = Query(default=0, ge=0),
+    ds: LoadedDataset = Depends(_dataset),
 ):
     """Get summary statistics.
 
     district_min_total can be used to compute an "active" district count that
     excludes extremely low-total districts (often typos/noise) from the KPI.
+    Everything is served from the precomputed ``DatasetStats``.
     """
 
-    districts = int(df["district"].nunique())
+    return {
+        "total_enrollments": ds.stats.total_enrollments,
+        "total_records": ds.stats.total_records,
+        "states": ds.stats.states,
+        "districts": ds.stats.districts,
+        "districts_active": ds.stats.districts_active(district_min_total),
+        "district_min_total": int(district_min_total),
+        "date_range": ds.stats.date_range(),
+    }
+
 
-    if district_min_total > 0 and len(df):
-        district_totals = df.groupby("district", sort=False)["total_enrolments"].sum()
-        districts_active = int((district_totals >= district_min_total).sum())
+def _filtered_summary_payload(
+    ds: LoadedDataset,
+    filters: QueryFilters,
+    selected: list[str],
+    district_min_total: int,
+    context: QueryContext,
+) -> dict:
+    overall = ds.query_engine.run(
+        QuerySpec(filters=filters, metrics=["total", "rows"], age_groups=selected), context
+    ).frame
+    by_state = ds.query_engine.run(QuerySpec(filters=filters, group_by=["state"], metrics=["rows"]), context).frame
+    by_district = ds.query_engine.run(
+        QuerySpec(filters=filters, group_by=["district"], metrics=["total"], age_groups=selected), context
+    ).frame
+
+    district_count = int(len(by_district))
+    if district_min_total > 0:
+        districts_active = int((by_district["total"] >= district_min_total).sum())
     else:
-        districts_active = districts
+        districts_active = district_count
 
     return {
-        "total_enrollments": int(df["total_enrolments"].sum()),
-        "total_records": int(len(df)),
-        "states": int(df["state"].nunique()),
-        "districts": districts,
+        "total_records": ds.stats.total_records,
+        "filtered_records": int(overall["rows"].iat[0]),
+        "filtered_enrollments": int(overall["total"].iat[0]),
+        "states": int(len(by_state)),
+        "districts": district_count,
         "districts_active": districts_active,
         "district_min_total": int(district_min_total),
-        "date_range": {
-            "start": df["date"].min().strftime("%Y-%m-%d"),
-            "end": df["date"].max().strftime("%Y-%m-%d"),
-        },
+        "date_range": ds.stats.date_range(),
     }
 
 
-@app.get("/api/filtered_summary")
-def get_filtered_summary(
+def _state_totals_payload(
+    ds: LoadedDataset, filters: QueryFilters, selected: list[str], context: QueryContext
+) -> dict:
+    result = ds.query_engine.run(
+        QuerySpec(
+            filters=filters,
+            group_by=["state"],
+            metrics=["total"],
+            age_groups=selected,
+            sort=QuerySort(by="total"),
+        ),
+        context,
+    )
+    states_out = [{"state": r["state"], "total_enrollments": r["total"]} for r in result.records()]
+
+    return {
+        "states": states_out,
+        "national_total": sum(r["total_enrollments"] for r in states_out),
+        "age_groups": selected,
+    }
+
+
+def _district_totals_payload(
+    ds: LoadedDataset, filters: QueryFilters, selected: list[str], context: QueryContext
+) -> dict:
+    result = ds.query_engine.run(
+        QuerySpec(
+            filters=filters,
+            group_by=["state", "district"],
+            metrics=["total"],
+            age_groups=selected,
+            sort=QuerySort(by="total"),
+        ),
+        context,
+    )
+    districts_out = [
+        {"state": r["state"], "district": r["district"], "total_enrollments": r["total"]}
+        for r in result.records()
+    ]
+
+    return {
+        "districts": districts_out,
+        "national_total": sum(r["total_enrollments"] for r in districts_out),
+        "age_groups": selected,
+    }
+
+
+@api.get("/api/filtered_summary")
+async def get_filtered_summary(
+    request: Request,
     start: str | None = None,
     end: str | None = None,
     states: list[str] | None = Query(default=None),
@@ -129,48 +357,32 @@ def get_filtered_summary(
     search: str | None = None,
     age_groups: list[str] | None = Query(default=None),
     district_min_total: int = Query(default=0, ge=0),
+    ds: LoadedDataset = Depends(_dataset),
 ):
     """Return true filtered counts/totals from the full dataset."""
-    filtered = filter_df(df, start=start, end=end, states=states, districts=districts, search=search)
-
-    allowed = {"age_0_5", "age_5_17", "age_18_greater"}
-    selected = [g for g in (age_groups or []) if g in allowed]
-    if not selected:
-        selected = ["age_0_5", "age_5_17", "age_18_greater"]
-
-    total_enrollments = int(filtered[selected].sum(axis=1).sum()) if len(filtered) else 0
-
-    district_count = int(filtered["district"].nunique()) if len(filtered) else 0
-    if district_min_total > 0 and len(filtered):
-        row_totals = filtered[selected].sum(axis=1)
-        district_totals = row_totals.groupby(filtered["district"], sort=False).sum()
-        districts_active = int((district_totals >= district_min_total).sum())
-    else:
-        districts_active = district_count
-
-    return {
-        "total_records": int(len(df)),
-        "filtered_records": int(len(filtered)),
-        "filtered_enrollments": total_enrollments,
-        "states": int(filtered["state"].nunique()) if len(filtered) else 0,
-        "districts": district_count,
-        "districts_active": districts_active,
-        "district_min_total": int(district_min_total),
-        "date_range": {
-            "start": df["date"].min().strftime("%Y-%m-%d"),
-            "end": df["date"].max().strftime("%Y-%m-%d"),
-        },
-    }
+    filters = QueryFilters(start=start, end=end, states=states, districts=districts, search=search)
+    return await _offload(
+        request,
+        ds,
+        _filtered_summary_payload,
+        ds,
+        filters,
+        select_age_groups(age_groups, ds.age_cols),
+        district_min_total,
+        QueryContext(),
+    )
 
 
-@app.get("/api/state_totals")
-def get_state_totals(
+@api.get("/api/state_totals")
+async def get_state_totals(
+    request: Request,
     start: str | None = None,
     end: str | None = None,
     states: list[str] | None = Query(default=None),
     districts: list[str] | None = Query(default=None),
     search: str | None = None,
     age_groups: list[str] | None = Query(default=None),
+    ds: LoadedDataset = Depends(_dataset),
 ):
     """Return total enrollments by state for the current filters.
 
@@ -178,43 +390,22 @@ def get_state_totals(
     respects the selected age groups when computing totals.
     """
 
-    filtered = filter_df(df, start=start, end=end, states=states, districts=districts, search=search)
-
-    allowed = {"age_0_5", "age_5_17", "age_18_greater"}
-    selected = [g for g in (age_groups or []) if g in allowed]
-    if not selected:
-        selected = ["age_0_5", "age_5_17", "age_18_greater"]
-
-    if len(filtered) == 0:
-        return {
-            "states": [],
-            "national_total": 0,
-            "age_groups": selected,
-        }
-
-    row_totals = filtered[selected].sum(axis=1)
-    state_totals = row_totals.groupby(filtered["state"], sort=False).sum().sort_values(ascending=False)
-
-    states_out = [
-        {"state": str(state), "total_enrollments": int(total)}
-        for state, total in state_totals.items()
-    ]
-
-    return {
-        "states": states_out,
-        "national_total": int(row_totals.sum()),
-        "age_groups": selected,
-    }
+    filters = QueryFilters(start=start, end=end, states=states, districts=districts, search=search)
+    return await _offload(
+        request, ds, _state_totals_payload, ds, filters, select_age_groups(age_groups, ds.age_cols), QueryContext()
+    )
 
 
-@app.get("/api/district_totals")
-def get_district_totals(
+@api.get("/api/district_totals")
+async def get_district_totals(
+    request: Request,
     start: str | None = None,
     end: str | None = None,
     states: list[str] | None = Query(default=None),
     districts: list[str] | None = Query(default=None),
     search: str | None = None,
     age_groups: list[str] | None = Query(default=None),
+    ds: LoadedDataset = Depends(_dataset),
 ):
     """Return total enrollments by district for the current filters.
 
@@ -223,99 +414,268 @@ def get_district_totals(
     selected age groups when computing totals.
     """
 
-    filtered = filter_df(df, start=start, end=end, states=states, districts=districts, search=search)
-
-    allowed = {"age_0_5", "age_5_17", "age_18_greater"}
-    selected = [g for g in (age_groups or []) if g in allowed]
-    if not selected:
-        selected = ["age_0_5", "age_5_17", "age_18_greater"]
-
-    if len(filtered) == 0:
-        return {
-            "districts": [],
-            "national_total": 0,
-            "age_groups": selected,
-        }
-
-    row_totals = filtered[selected].sum(axis=1)
-    grp = (
-        row_totals.groupby([filtered["state"], filtered["district"]], sort=False)
-        .sum()
-        .sort_values(ascending=False)
+    filters = QueryFilters(start=start, end=end, states=states, districts=districts, search=search)
+    return await _offload(
+        request, ds, _district_totals_payload, ds, filters, select_age_groups(age_groups, ds.age_cols), QueryContext()
     )
 
-    district_df = grp.reset_index(name="total_enrollments")
-    districts_out = [
-        {
-            "state": str(row["state"]),
-            "district": str(row["district"]),
-            "total_enrollments": int(row["total_enrollments"]),
-        }
-        for _, row in district_df.iterrows()
-    ]
+
+@api.post("/api/query")
+async def post_query(request: Request, spec: QuerySpec, ds: LoadedDataset = Depends(_dataset)):
+    """Run a declarative group-by/metric query (see ``backend.query.QuerySpec``).
+
+    The response reports which plan answered it: ``prefix`` (cumulative sums),
+    ``cube`` (per-state daily totals) or ``scan`` (full filter pass).
+    """
+
+    return await _offload(request, ds, _query_payload, ds, spec)
+
+
+def _query_payload(ds: LoadedDataset, spec: QuerySpec) -> dict:
+    try:
+        result = ds.query_engine.run(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
-        "districts": districts_out,
-        "national_total": int(row_totals.sum()),
-        "age_groups": selected,
+        "plan": result.plan,
+        "dimensions": result.dimensions,
+        "metrics": result.metrics,
+        "rows": result.records(),
     }
 
 
-@app.get("/api/cleaning_report")
-def get_cleaning_report(
+@api.get("/api/cleaning_report")
+async def get_cleaning_report(
     district_min_total: int = Query(default=0, ge=0),
+    ds: LoadedDataset = Depends(_dataset),
 ):
     """Return the latest data cleaning report for the currently loaded dataset."""
 
-    base = cleaning_report or {}
+    base = ds.cleaning_report or {}
     out = dict(base)
 
-    # Add active district count if requested
-    if district_min_total > 0 and len(df):
-        district_totals = df.groupby("district", sort=False)["total_enrolments"].sum()
-        out["districts_active"] = int((district_totals >= district_min_total).sum())
-        out["district_min_total"] = int(district_min_total)
-    else:
-        out["districts_active"] = int(df["district"].nunique()) if len(df) else 0
-        out["district_min_total"] = int(district_min_total)
+    out["districts_active"] = ds.stats.districts_active(district_min_total)
+    out["district_min_total"] = int(district_min_total)
 
-    if len(df):
-        out["date_range"] = {
-            "start": df["date"].min().strftime("%Y-%m-%d"),
-            "end": df["date"].max().strftime("%Y-%m-%d"),
-        }
+    if ds.stats.total_records:
+        out["date_range"] = ds.stats.date_range()
 
     return out
 
 
-@app.get("/api/action_recommendations")
-def get_action_recommendations(
+def _pct_change(current: float, previous: float) -> float | None:
+    if previous <= 0:
+        return None
+    return (current - previous) / previous * 100.0
+
+
+def _comparison_rows(keys: pd.DataFrame, current: np.ndarray, previous: np.ndarray) -> list[dict]:
+    rows = []
+    for i in np.argsort(-current, kind="mergesort"):
+        cur = float(current[i])
+        prev = float(previous[i])
+        row = {col: str(keys.iat[i, j]) for j, col in enumerate(keys.columns)}
+        row.update(
+            {
+                "current": int(cur),
+                "previous": int(prev),
+                "delta": int(cur - prev),
+                "pct_change": _pct_change(cur, prev),
+            }
+        )
+        rows.append(row)
+    return rows
+
+
+@api.get("/api/compare")
+async def get_comparison(
+    request: Request,
     start: str | None = None,
     end: str | None = None,
+    mode: str = Query(default="previous_period", pattern="^(previous_period|same_period_last_year|custom)$"),
+    compare_start: str | None = None,
+    compare_end: str | None = None,
     states: list[str] | None = Query(default=None),
     districts: list[str] | None = Query(default=None),
     search: str | None = None,
     age_groups: list[str] | None = Query(default=None),
+    ds: LoadedDataset = Depends(_dataset),
 ):
-    """Return data-driven action recommendations for the Forecast tab."""
+    """Compare enrollment totals between two date ranges per state and district.
+
+    The current period defaults to the last 30 days of data. The comparison
+    period is either the immediately preceding range of equal length
+    (``previous_period``), the same range one year earlier
+    (``same_period_last_year``), or ``compare_start``/``compare_end`` when
+    ``mode=custom``. Both periods are answered by the query engine's prefix-sum
+    plan, so the cost is proportional to the number of districts rather than
+    rows.
+    """
 
-    filtered = filter_df(df, start=start, end=end, states=states, districts=districts, search=search)
+    return await _offload(
+        request,
+        ds,
+        _comparison_payload,
+        ds,
+        start=start,
+        end=end,
+        mode=mode,
+        compare_start=compare_start,
+        compare_end=compare_end,
+        states=states,
+        districts=districts,
+        search=search,
+        age_groups=age_groups,
+    )
 
-    allowed = {"age_0_5", "age_5_17", "age_18_greater"}
-    selected = [g for g in (age_groups or []) if g in allowed]
-    if not selected:
-        selected = ["age_0_5", "age_5_17", "age_18_greater"]
 
-    if len(filtered) == 0:
-        return {"priority_items": [], "best_practices": [], "age_groups": selected}
+def _comparison_payload(
+    ds: LoadedDataset,
+    *,
+    start: str | None,
+    end: str | None,
+    mode: str,
+    compare_start: str | None,
+    compare_end: str | None,
+    states: list[str] | None,
+    districts: list[str] | None,
+    search: str | None,
+    age_groups: list[str] | None,
+) -> dict:
+    selected = select_age_groups(age_groups, ds.age_cols)
+    if ds.rows == 0:
+        raise HTTPException(status_code=404, detail="No data loaded")
+
+    def _parse(value: str | None, name: str) -> pd.Timestamp | None:
+        if not value:
+            return None
+        ts = pd.to_datetime(value, errors="coerce")
+        if pd.isna(ts):
+            raise HTTPException(status_code=400, detail=f"Invalid date for {name}: {value}")
+        return ts
+
+    out_of_range = HTTPException(status_code=400, detail="Comparison periods must fall between years 1 and 9999")
+    cur_end = _parse(end, "end") or pd.Timestamp(ds.stats.date_end)
+    try:
+        cur_start = _parse(start, "start") or (cur_end - pd.Timedelta(days=29))
+    except (OverflowError, ValueError):
+        raise out_of_range from None
+    if cur_start > cur_end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    if mode == "custom":
+        prev_start = _parse(compare_start, "compare_start")
+        prev_end = _parse(compare_end, "compare_end")
+        if prev_start is None or prev_end is None:
+            raise HTTPException(status_code=400, detail="compare_start and compare_end are required for mode=custom")
+        if prev_start > prev_end:
+            raise HTTPException(status_code=400, detail="compare_start must not be after compare_end")
+    else:
+        try:
+            if mode == "same_period_last_year":
+                prev_start = cur_start - pd.DateOffset(years=1)
+                prev_end = cur_end - pd.DateOffset(years=1)
+            else:
+                length = cur_end - cur_start
+                prev_end = cur_start - pd.Timedelta(days=1)
+                prev_start = prev_end - length
+        except (OverflowError, ValueError):
+            raise out_of_range from None
+
+    # Derived periods can leave the calendar (before year 1), which dates cannot represent
+    if min(cur_start, prev_start).year < dt.MINYEAR or max(cur_end, prev_end).year > dt.MAXYEAR:
+        raise out_of_range
+
+    filters = QueryFilters(states=states, districts=districts, search=search)
+    context = QueryContext()
+
+    def _period(lo: pd.Timestamp, hi: pd.Timestamp, group_by: list[str]) -> pd.DataFrame:
+        spec = QuerySpec(
+            filters=filters.model_copy(update={"start": lo.isoformat(), "end": hi.isoformat()}),
+            group_by=group_by,
+            metrics=["total"],
+            age_groups=selected,
+        )
+        return ds.query_engine.run(spec, context).frame
 
-    row_totals = filtered[selected].sum(axis=1)
+    def _merge(group_by: list[str]) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        merged = _period(cur_start, cur_end, group_by).merge(
+            _period(prev_start, prev_end, group_by), on=group_by, how="outer", suffixes=("_cur", "_prev")
+        )
+        merged = merged.sort_values(group_by, kind="mergesort").reset_index(drop=True)
+        current = merged["total_cur"].fillna(0).to_numpy(dtype=float)
+        previous = merged["total_prev"].fillna(0).to_numpy(dtype=float)
+        return merged[group_by], current, previous
 
+    entities, current, previous = _merge(["state", "district"])
+    state_keys, state_current, state_previous = _merge(["state"])
+
+    cur_total = float(current.sum())
+    prev_total = float(previous.sum())
+
+    return {
+        "mode": mode,
+        "current_period": {"start": cur_start.date().isoformat(), "end": cur_end.date().isoformat()},
+        "previous_period": {"start": prev_start.date().isoformat(), "end": prev_end.date().isoformat()},
+        "totals": {
+            "current": int(cur_total),
+            "previous": int(prev_total),
+            "delta": int(cur_total - prev_total),
+            "pct_change": _pct_change(cur_total, prev_total),
+        },
+        "states": _comparison_rows(state_keys, state_current, state_previous),
+        "districts": _comparison_rows(entities, current, previous),
+        "age_groups": selected,
+    }
+
+
+@api.get("/api/action_recommendations")
+async def get_action_recommendations(
+    request: Request,
+    start: str | None = None,
+    end: str | None = None,
+    states: list[str] | None = Query(default=None),
+    districts: list[str] | None = Query(default=None),
+    search: str | None = None,
+    age_groups: list[str] | None = Query(default=None),
+    ds: LoadedDataset = Depends(_dataset),
+):
+    """Return data-driven action recommendations for the Forecast tab."""
+
+    filters = QueryFilters(start=start, end=end, states=states, districts=districts, search=search)
+    return await _offload(
+        request,
+        ds,
+        _action_recommendations_payload,
+        ds,
+        filters,
+        select_age_groups(age_groups, ds.age_cols),
+        QueryContext(),
+    )
+
+
+def _action_recommendations_payload(
+    ds: LoadedDataset, filters: QueryFilters, selected: list[str], context: QueryContext
+) -> dict:
     # Total by state
-    state_total = row_totals.groupby(filtered["state"], sort=False).sum().sort_values(ascending=False)
+    state_total = (
+        ds.query_engine.run(
+            QuerySpec(filters=filters, group_by=["state"], metrics=["total"], age_groups=selected, sort=QuerySort(by="total")),
+            context,
+        )
+        .frame.set_index("state")["total"]
+    )
+    if len(state_total) == 0:
+        return {"priority_items": [], "best_practices": [], "age_groups": selected}
 
     # Daily totals by state (for growth/anomaly)
-    daily = row_totals.groupby([filtered["state"], filtered["date"]], sort=False).sum().reset_index(name="y")
+    daily = (
+        ds.query_engine.run(
+            QuerySpec(filters=filters, group_by=["state", "date"], metrics=["total"], age_groups=selected), context
+        )
+        .frame.rename(columns={"total": "y"})
+    )
     max_date = pd.to_datetime(daily["date"]).max()
     recent_start = max_date - pd.Timedelta(days=29)
     prev_start = max_date - pd.Timedelta(days=59)
@@ -422,6 +782,59 @@ def get_action_recommendations(
         "age_groups": selected,
     }
 
+
+class BatchFilters(QueryFilters):
+    age_groups: list[str] | None = None
+    district_min_total: int = Field(default=0, ge=0)
+
+
+class BatchQuery(BaseModel):
+    name: str
+    type: Literal["filtered_summary", "state_totals", "district_totals", "action_recommendations"]
+
+
+class BatchRequest(BaseModel):
+    filters: BatchFilters = Field(default_factory=BatchFilters)
+    queries: list[BatchQuery] = Field(min_length=1)
+
+
+@api.post("/api/batch")
+async def post_batch(request: Request, batch: BatchRequest, ds: LoadedDataset = Depends(_dataset)):
+    """Answer several aggregation queries that share one filter spec.
+
+    All sub-queries run through one ``QueryContext``, so each filter is
+    evaluated once and reused by every aggregation. This lets the dashboard
+    refresh its summary, state totals and recommendations in a single round
+    trip. Results are keyed by each sub-query's ``name``.
+    """
+
+    names = [q.name for q in batch.queries]
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Sub-query names must be unique")
+
+    return await _offload(request, ds, _batch_payload, ds, batch)
+
+
+def _batch_payload(ds: LoadedDataset, request: BatchRequest) -> dict:
+    f = request.filters
+    selected = select_age_groups(f.age_groups, ds.age_cols)
+    context = QueryContext()
+
+    results: dict[str, dict] = {}
+    for q in request.queries:
+        if q.type == "filtered_summary":
+            results[q.name] = _filtered_summary_payload(ds, f, selected, f.district_min_total, context)
+        elif q.type == "state_totals":
+            results[q.name] = _state_totals_payload(ds, f, selected, context)
+        elif q.type == "district_totals":
+            results[q.name] = _district_totals_payload(ds, f, selected, context)
+        else:
+            results[q.name] = _action_recommendations_payload(ds, f, selected, context)
+
+    return {"results": results}
+
+app.include_router(api)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
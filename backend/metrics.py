@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS: tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Per-request phase accumulator; set by the middleware, filled by ``phase()``.
+# WorkerPool copies the context into its threads, so work offloaded there
+# reports into the same dict.
+_request_phases: ContextVar[dict[str, float] | None] = ContextVar("uidai_request_phases", default=None)
+
+logger = logging.getLogger("uidai.slow_requests")
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the wall time of the block to the current request's ``name`` phase.
+
+    A no-op outside a request (scripts, tests, startup).
+    """
+
+    phases = _request_phases.get()
+    if phases is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - t0
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels: str) -> str:
+    parts = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Request metrics kept in process and rendered as Prometheus text.
+
+    Counters and histograms are keyed by route template (``/api/compare``,
+    not the raw URL), so label cardinality stays bounded by the app's routes.
+    Values are per process; with several uvicorn workers each one reports
+    its own series.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests: Counter[tuple[str, str, str]] = Counter()
+        self.latency: dict[str, Histogram] = {}
+        self.phase_latency: dict[tuple[str, str], Histogram] = {}
+        self.response_size: dict[str, Histogram] = {}
+        self.in_flight = 0
+        self.cache: Counter[tuple[str, str]] = Counter()
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def gauge_fn(self, name: str, help_text: str, fn: Callable[[], float]) -> None:
+        """Register a gauge whose value is read from ``fn`` at scrape time."""
+
+        self._gauges[name] = (help_text, fn)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(
+        self,
+        route: str,
+        method: str,
+        status: int,
+        duration: float,
+        size: int,
+        phases: dict[str, float],
+    ) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests[(route, method, str(status))] += 1
+            self.latency.setdefault(route, Histogram(LATENCY_BUCKETS)).observe(duration)
+            self.response_size.setdefault(route, Histogram(SIZE_BUCKETS)).observe(size)
+            for name, seconds in phases.items():
+                self.phase_latency.setdefault((route, name), Histogram(LATENCY_BUCKETS)).observe(seconds)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        with self._lock:
+            self.cache[(cache, "hit" if hit else "miss")] += 1
+
+    def render(self) -> str:
+        lines: list[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, labels: dict[str, str], h: Histogram) -> None:
+            cumulative = 0
+            for bound, count in zip((*h.buckets, float("inf")), h.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                lines.append(f"{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(**labels)} {_fmt(h.sum)}")
+            lines.append(f"{name}_count{_labels(**labels)} {h.count}")
+
+        with self._lock:
+            header("uidai_http_requests_total", "counter", "HTTP requests by route, method and status.")
+            for (route, method, status), n in sorted(self.requests.items()):
+                lines.append(f"uidai_http_requests_total{_labels(route=route, method=method, status=status)} {n}")
+
+            header("uidai_http_requests_in_flight", "gauge", "Requests currently being handled.")
+            lines.append(f"uidai_http_requests_in_flight {self.in_flight}")
+
+            header("uidai_http_request_duration_seconds", "histogram", "End-to-end request latency.")
+            for route, h in sorted(self.latency.items()):
+                histogram("uidai_http_request_duration_seconds", {"route": route}, h)
+
+            header(
+                "uidai_http_request_phase_seconds",
+                "histogram",
+                "Time per request spent in the filter, aggregate, serialize and compress phases.",
+            )
+            for (route, name), h in sorted(self.phase_latency.items()):
+                histogram("uidai_http_request_phase_seconds", {"route": route, "phase": name}, h)
+
+            header("uidai_http_response_size_bytes", "histogram", "Response body size.")
+            for route, h in sorted(self.response_size.items()):
+                histogram("uidai_http_response_size_bytes", {"route": route}, h)
+
+            header("uidai_cache_requests_total", "counter", "Cache lookups by cache and result (hit/miss).")
+            for (cache, result), n in sorted(self.cache.items()):
+                lines.append(f"uidai_cache_requests_total{_labels(cache=cache, result=result)} {n}")
+
+            gauges = list(self._gauges.items())
+
+        for name, (help_text, fn) in gauges:
+            header(name, "gauge", help_text)
+            lines.append(f"{name} {_fmt(fn())}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    registry.record_cache(cache, hit)
+
+
+# Leaf frames of threads that are idle rather than doing request work
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+
+
+def _collapse(frame, max_depth: int = 48) -> str | None:
+    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+        return None
+    parts = []
+    while frame is not None and len(parts) < max_depth:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        parts.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class SlowRequestProfiler:
+    """Opt-in sampling profiler for requests slower than ``threshold_ms``.
+
+    While at least one request is in flight, a daemon thread snapshots every
+    thread's stack each ``interval_ms`` and credits the collapsed stacks to
+    all in-flight requests. When a request finishes over the threshold its
+    hottest stacks are logged to ``uidai.slow_requests`` and kept in
+    ``recent`` (collapsed ``module:function:line;...`` format, root first).
+    Requests under the threshold discard their samples.
+
+    Sampling is process-wide, so concurrent requests share samples; that is
+    the usual trade-off of a low-overhead sampler and fine for spotting hot
+    paths.
+    """
+
+    def __init__(self, threshold_ms: float, interval_ms: float = 5.0, top: int = 15, keep: int = 20):
+        self.threshold_s = max(0.0, float(threshold_ms)) / 1000.0
+        self.interval_s = max(0.001, float(interval_ms) / 1000.0)
+        self.top = top
+        self.recent: deque[dict] = deque(maxlen=keep)
+        self._active: dict[int, Counter[str]] = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def begin(self) -> int:
+        with self._lock:
+            self._next_token += 1
+            token = self._next_token
+            self._active[token] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="uidai-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return token
+
+    def end(self, token: int, route: str, method: str, duration: float) -> None:
+        with self._lock:
+            samples = self._active.pop(token, None)
+            if not self._active:
+                self._wake.clear()
+        if samples is None or duration < self.threshold_s:
+            return
+
+        report = {
+            "route": route,
+            "method": method,
+            "duration_ms": round(duration * 1000.0, 3),
+            "samples": sum(samples.values()),
+            "interval_ms": self.interval_s * 1000.0,
+            "stacks": [{"stack": s, "samples": n} for s, n in samples.most_common(self.top)],
+        }
+        self.recent.append(report)
+        logger.warning(
+            "Slow request %s %s took %.1fms (%d samples)\n%s",
+            method,
+            route,
+            report["duration_ms"],
+            report["samples"],
+            "\n".join(f"  {s['samples']:>5}  {s['stack']}" for s in report["stacks"]),
+        )
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval_s)
+            stacks = [
+                s for tid, frame in sys._current_frames().items() if tid != own and (s := _collapse(frame)) is not None
+            ]
+            with self._lock:
+                for samples in self._active.values():
+                    samples.update(stacks)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, phases, size and in-flight counts.
+
+    Requests are labelled with the matched route template; unmatched paths
+    share the ``unmatched`` label so scanners cannot blow up cardinality. The
+    route is only known after routing, so the in-flight gauge is process-wide.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry, profiler: SlowRequestProfiler | None = None):
+        self.app = app
+        self.registry = registry
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+        phases: dict[str, float] = {}
+        token = _request_phases.set(phases)
+        sample_token = self.profiler.begin() if self.profiler else None
+        self.registry.request_started()
+        t0 = time.perf_counter()
+
+        async def _send(message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            duration = time.perf_counter() - t0
+            _request_phases.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            self.registry.request_finished(route, method, status, duration, size, phases)
+            if sample_token is not None:
+                self.profiler.end(sample_token, route, method, duration)
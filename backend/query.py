@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+try:
+    from backend.aggregates import PrefixSums, StateDateCube
+    from backend.cleaning import AGE_COLS, filter_df
+    from backend.metrics import phase, record_cache
+except ModuleNotFoundError:
+    from aggregates import PrefixSums, StateDateCube
+    from cleaning import AGE_COLS, filter_df
+    from metrics import phase, record_cache
+
+
+Dimension = Literal["date", "week", "month", "state", "district", "day_of_week"]
+
+TIME_DIMS: frozenset[str] = frozenset({"date", "week", "month", "day_of_week"})
+DAY_NAMES: tuple[str, ...] = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+class QueryFilters(BaseModel):
+    start: str | None = None
+    end: str | None = None
+    states: list[str] | None = None
+    districts: list[str] | None = None
+    search: str | None = None
+
+
+class QuerySort(BaseModel):
+    by: str
+    descending: bool = True
+
+
+class QuerySpec(BaseModel):
+    """Declarative group-by/metric request.
+
+    ``metrics`` may name individual age buckets, ``total`` (the sum of the
+    selected ``age_groups``, defaulting to all buckets) or ``rows`` (the number
+    of cleaned records).
+    """
+
+    filters: QueryFilters = Field(default_factory=QueryFilters)
+    group_by: list[Dimension] = Field(default_factory=list)
+    metrics: list[str] = Field(default_factory=lambda: ["total"])
+    age_groups: list[str] | None = None
+    sort: QuerySort | None = None
+    limit: int | None = Field(default=None, ge=1)
+
+
+def select_age_groups(age_groups: list[str] | None, age_cols: tuple[str, ...] = AGE_COLS) -> list[str]:
+    """Keep known age buckets, falling back to all of them when none remain."""
+
+    selected = [g for g in (age_groups or []) if g in age_cols]
+    return selected or list(age_cols)
+
+
+def parse_bound(value: str | None) -> pd.Timestamp | None:
+    """Parse a date filter bound the same lenient way ``filter_df`` does."""
+
+    if not value:
+        return None
+    ts = pd.to_datetime(value, errors="coerce")
+    return None if pd.isna(ts) else ts
+
+
+def _filter_key(filters: QueryFilters) -> str:
+    return json.dumps([filters.start, filters.end, filters.states, filters.districts, filters.search])
+
+
+@dataclass
+class QueryContext:
+    """Memoizes filter evaluation across the queries of one request."""
+
+    scans: dict[str, pd.DataFrame] = field(default_factory=dict)
+    masks: dict[str, np.ndarray] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class QueryResult:
+    frame: pd.DataFrame
+    plan: str
+    dimensions: list[str]
+    metrics: list[str]
+
+    def records(self) -> list[dict]:
+        """Serialize to JSON-friendly rows (ISO dates, ``YYYY-MM`` months, int metrics)."""
+
+        with phase("serialize"):
+            return self._records()
+
+    def _records(self) -> list[dict]:
+        columns: dict[str, list] = {}
+        for dim in self.dimensions:
+            col = self.frame[dim]
+            if dim in {"date", "week"}:
+                columns[dim] = col.dt.strftime("%Y-%m-%d").tolist()
+            elif dim == "month":
+                columns[dim] = col.astype(str).tolist()
+            elif dim == "day_of_week":
+                columns[dim] = [DAY_NAMES[int(d)] for d in col]
+            else:
+                columns[dim] = col.astype(str).tolist()
+        for metric in self.metrics:
+            columns[metric] = np.rint(self.frame[metric].to_numpy(dtype=float)).astype(np.int64).tolist()
+
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def validate_spec(spec: QuerySpec, age_cols: tuple[str, ...] = AGE_COLS) -> tuple[list[str], list[str]]:
+    """Deduplicated dimensions and metrics of ``spec``; ``ValueError`` if it cannot be answered."""
+
+    dims = list(dict.fromkeys(spec.group_by))
+    metrics = list(dict.fromkeys(spec.metrics))
+    unknown = [m for m in metrics if m not in (*age_cols, "total", "rows")]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    if spec.sort and spec.sort.by not in metrics and spec.sort.by not in dims:
+        raise ValueError(f"Cannot sort by {spec.sort.by!r}: not a requested metric or dimension")
+    return dims, metrics
+
+
+def merge_partials(parts: list[pd.DataFrame], dims: list[str]) -> pd.DataFrame:
+    """Sum ``QueryEngine.partial`` frames computed over disjoint slices of the data.
+
+    Groups come out in the same sorted order a single ``partial`` over all the
+    data would produce. The sums are of integer counts, so they are exact
+    whatever order they are added in.
+    """
+
+    if not dims:
+        return pd.concat(parts).sum().to_frame().T
+    # Slices without matching rows may carry looser key dtypes; leave them out
+    nonempty = [p for p in parts if len(p)]
+    if len(nonempty) <= 1:
+        return (nonempty or parts)[0]
+    return pd.concat(nonempty, ignore_index=True).groupby(dims, sort=True).sum().reset_index()
+
+
+def finalize(out: pd.DataFrame, spec: QuerySpec, age_cols: tuple[str, ...] = AGE_COLS) -> QueryResult:
+    """Turn a partial into the requested result: selected total, sort and limit."""
+
+    dims, metrics = validate_spec(spec, age_cols)
+    with phase("aggregate"):
+        out["total"] = out[select_age_groups(spec.age_groups, age_cols)].sum(axis=1)
+
+        if spec.sort:
+            out = out.sort_values(spec.sort.by, ascending=not spec.sort.descending, kind="mergesort")
+        if spec.limit:
+            out = out.head(spec.limit)
+
+    return QueryResult(
+        frame=out[dims + metrics].reset_index(drop=True),
+        plan=QueryEngine.plan(spec),
+        dimensions=dims,
+        metrics=metrics,
+    )
+
+
+class QueryEngine:
+    """Plans and executes ``QuerySpec`` requests against the cleaned dataset.
+
+    Each query runs against the cheapest structure that can answer it exactly:
+
+    - ``prefix``: no time grouping, answered from per-(state, district)
+      cumulative sums in O(districts) regardless of the date range.
+    - ``cube``: time grouping without district filters/grouping/search,
+      answered from the per-(date, state) cube.
+    - ``scan``: everything else, via ``filter_df`` over the full frame.
+
+    ``age_cols`` are the dataset's measure columns, the metrics besides
+    ``total`` and ``rows``.
+    """
+
+    def __init__(self, df: pd.DataFrame, prefix_sums: PrefixSums, cube: StateDateCube):
+        self.df = df
+        self.prefix_sums = prefix_sums
+        self.cube = cube
+        self.age_cols = prefix_sums.age_cols
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, age_cols: tuple[str, ...] = AGE_COLS) -> "QueryEngine":
+        return cls(df, PrefixSums.from_frame(df, age_cols), StateDateCube.from_frame(df, age_cols))
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the prefix sums and cube; the frame belongs to the caller."""
+
+        prefix = self.prefix_sums
+        return int(
+            prefix.entities.memory_usage(deep=True).sum()
+            + prefix.cum.nbytes
+            + prefix.counts.nbytes
+            + self.cube.frame.memory_usage(deep=True).sum()
+        )
+
+    @staticmethod
+    def plan(spec: QuerySpec) -> str:
+        dims = set(spec.group_by)
+        if not dims & TIME_DIMS:
+            return "prefix"
+        if "district" not in dims and not spec.filters.districts and not (spec.filters.search or "").strip():
+            return "cube"
+        return "scan"
+
+    def run(self, spec: QuerySpec, context: QueryContext | None = None) -> QueryResult:
+        validate_spec(spec, self.age_cols)
+        return finalize(self.partial(spec, context), spec, self.age_cols)
+
+    def partial(self, spec: QuerySpec, context: QueryContext | None = None) -> pd.DataFrame:
+        """Age bucket sums and row counts per group, before totals, sorting and limits.
+
+        Partials of disjoint slices of the data combine with ``merge_partials``.
+        """
+
+        context = context or QueryContext()
+        plan = self.plan(spec)
+        with phase("filter"):
+            if plan == "prefix":
+                base = self._prefix_base(spec.filters, context)
+            elif plan == "cube":
+                base = self.cube.slice(
+                    parse_bound(spec.filters.start), parse_bound(spec.filters.end), spec.filters.states
+                )
+            else:
+                base = self._scan_base(spec.filters, context)
+
+        with phase("aggregate"):
+            return self._aggregate(base, list(dict.fromkeys(spec.group_by)))
+
+    def _prefix_base(self, filters: QueryFilters, context: QueryContext) -> pd.DataFrame:
+        key = _filter_key(filters)
+        mask = context.masks.get(key)
+        record_cache("query_context", mask is not None)
+        if mask is None:
+            mask = self.prefix_sums.entity_mask(states=filters.states, districts=filters.districts, search=filters.search)
+            context.masks[key] = mask
+
+        sums, counts = self.prefix_sums.window(parse_bound(filters.start), parse_bound(filters.end))
+        keep = mask & (counts > 0)
+        base = self.prefix_sums.entities[keep].copy()
+        for i, col in enumerate(self.prefix_sums.age_cols):
+            base[col] = sums[keep, i]
+        base["rows"] = counts[keep]
+        return base
+
+    def _scan_base(self, filters: QueryFilters, context: QueryContext) -> pd.DataFrame:
+        key = _filter_key(filters)
+        base = context.scans.get(key)
+        record_cache("query_context", base is not None)
+        if base is None:
+            filtered = filter_df(
+                self.df,
+                start=filters.start,
+                end=filters.end,
+                states=filters.states,
+                districts=filters.districts,
+                search=filters.search,
+            )
+            base = filtered[["date", "state", "district", *self.age_cols]].assign(rows=1)
+            context.scans[key] = base
+        return base
+
+    def _aggregate(self, base: pd.DataFrame, dims: list[str]) -> pd.DataFrame:
+        values = base[[*self.age_cols, "rows"]]
+        if not dims:
+            return values.sum().to_frame().T
+
+        keys = []
+        for dim in dims:
+            if dim == "week":
+                key = base["date"] - pd.to_timedelta(base["date"].dt.dayofweek, unit="D")
+            elif dim == "month":
+                key = base["date"].dt.to_period("M")
+            elif dim == "day_of_week":
+                key = base["date"].dt.dayofweek
+            else:
+                key = base[dim]
+            keys.append(key.rename(dim))
+
+        return values.groupby(keys, sort=True).sum().reset_index()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from backend.cleaning import AGE_COLS, clean_dataframe_with_report
+    from backend.districts import DistrictDictionary
+    from backend.query import QueryEngine
+    from backend.stats import DatasetStats
+except ModuleNotFoundError:
+    from cleaning import AGE_COLS, clean_dataframe_with_report
+    from districts import DistrictDictionary
+    from query import QueryEngine
+    from stats import DatasetStats
+
+# Bump when the pickled layout of ServingDataset or its members changes
+ARTIFACT_VERSION = 2
+
+
+@dataclass(frozen=True)
+class ServingDataset:
+    """Everything the API serves from: the cleaned frame plus derived structures.
+
+    ``df`` and ``query_engine`` are None when queries are answered by shard
+    processes, which hold the rows and build their own engines.
+    """
+
+    df: pd.DataFrame | None
+    cleaning_report: dict
+    query_engine: QueryEngine | None
+    stats: DatasetStats
+
+    @classmethod
+    def from_raw(
+        cls,
+        raw: pd.DataFrame,
+        *,
+        profile_memory: bool = False,
+        district_dictionary: DistrictDictionary | None = None,
+        age_cols: tuple[str, ...] = AGE_COLS,
+        build_query_engine: bool = True,
+    ) -> "ServingDataset":
+        cleaned, report = clean_dataframe_with_report(
+            raw, profile_memory=profile_memory, district_dictionary=district_dictionary, age_cols=age_cols
+        )
+        return cls(
+            df=cleaned,
+            cleaning_report=report,
+            query_engine=QueryEngine.from_frame(cleaned, age_cols) if build_query_engine else None,
+            stats=DatasetStats.from_frame(cleaned),
+        )
+
+    @classmethod
+    def from_csv(
+        cls,
+        csv_path: Path,
+        *,
+        profile_memory: bool = False,
+        district_dictionary: DistrictDictionary | None = None,
+        age_cols: tuple[str, ...] = AGE_COLS,
+        build_query_engine: bool = True,
+    ) -> "ServingDataset":
+        return cls.from_raw(
+            pd.read_csv(csv_path),
+            profile_memory=profile_memory,
+            district_dictionary=district_dictionary,
+            age_cols=age_cols,
+            build_query_engine=build_query_engine,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate resident size: the cleaned frame plus the query engine's structures."""
+
+        frame_nbytes = self.df.memory_usage(deep=True).sum() if self.df is not None else 0
+        engine_nbytes = self.query_engine.nbytes if self.query_engine is not None else 0
+        return int(frame_nbytes + self.stats.district_totals.nbytes + engine_nbytes)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_artifact(
+    dataset: ServingDataset,
+    path: Path,
+    *,
+    source: Path | None = None,
+    dictionary: Path | None = None,
+) -> None:
+    """Pickle ``dataset`` with a header recording its format version and input file hashes."""
+
+    payload = {
+        "version": ARTIFACT_VERSION,
+        "pandas": pd.__version__,
+        "source_sha256": file_sha256(source) if source else None,
+        "dictionary_sha256": file_sha256(dictionary) if dictionary else None,
+        "dataset": dataset,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+
+
+def read_artifact(path: Path, *, source: Path | None = None, dictionary: Path | None = None) -> ServingDataset:
+    """Load a serving artifact written by ``write_artifact``.
+
+    Raises ``ValueError`` when it was built by another format version or
+    pandas version, from a different ``source`` CSV than the one given, or
+    with a different district ``dictionary`` (or with/without one). These
+    input checks are skipped when ``source`` does not exist, so a deployment
+    may ship the artifact without the CSV. Only load artifacts you built:
+    this is a pickle.
+    """
+
+    with open(path, "rb") as f:
+        payload = pickle.load(f)
+
+    if not isinstance(payload, dict) or payload.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"{path} is not a version {ARTIFACT_VERSION} serving artifact")
+    if payload.get("pandas") != pd.__version__:
+        raise ValueError(f"{path} was built with pandas {payload.get('pandas')}, running {pd.__version__}")
+    if source is not None and source.exists():
+        if payload.get("source_sha256") != file_sha256(source):
+            raise ValueError(f"{path} was built from a different version of {source.name}")
+        expected = file_sha256(dictionary) if dictionary is not None and dictionary.exists() else None
+        if payload.get("dictionary_sha256") != expected:
+            raise ValueError(f"{path} was built with a different district dictionary")
+    return payload["dataset"]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.cleaning import AGE_COLS
+    from backend.metrics import phase
+    from backend.query import QueryContext, QueryEngine, QueryResult, QuerySpec, finalize, merge_partials, validate_spec
+except ModuleNotFoundError:
+    from cleaning import AGE_COLS
+    from metrics import phase
+    from query import QueryContext, QueryEngine, QueryResult, QuerySpec, finalize, merge_partials, validate_spec
+
+
+def state_shards(df: pd.DataFrame, shards: int) -> np.ndarray:
+    """Shard number of each row of ``df``, keeping states whole and row counts balanced.
+
+    States are placed largest first on the least loaded shard (ties by name),
+    so the assignment is deterministic for a given dataset.
+    """
+
+    sizes = df.groupby("state", sort=True).size().sort_values(ascending=False, kind="mergesort")
+    loads = [0] * shards
+    assignment: dict[str, int] = {}
+    for state, rows in sizes.items():
+        target = loads.index(min(loads))
+        assignment[state] = target
+        loads[target] += int(rows)
+    return df["state"].map(assignment).to_numpy()
+
+
+def partition_by_state(df: pd.DataFrame, shards: int) -> list[pd.DataFrame]:
+    """Split ``df`` into ``shards`` frames of whole states; rows keep their order within each."""
+
+    shard_of = state_shards(df, shards)
+    return [df[shard_of == i].reset_index(drop=True) for i in range(shards)]
+
+
+def shards_from_env() -> int:
+    """Shard count from ``UIDAI_SHARDS``; 1 or less means a single-process engine."""
+
+    return int(os.environ.get("UIDAI_SHARDS", 0) or 0)
+
+
+# The shard a worker process serves; set once by _init_shard
+_shard_engine: QueryEngine | None = None
+
+
+def _init_shard(frame: pd.DataFrame, age_cols: tuple[str, ...]) -> None:
+    global _shard_engine
+    _shard_engine = QueryEngine.from_frame(frame, age_cols)
+
+
+def _shard_partial(spec: QuerySpec) -> pd.DataFrame:
+    return _shard_engine.partial(spec)
+
+
+def _shard_take(local: np.ndarray) -> pd.DataFrame:
+    return _shard_engine.df.take(local)
+
+
+def _shard_nbytes() -> int:
+    return int(_shard_engine.df.memory_usage(deep=True).sum()) + _shard_engine.nbytes
+
+
+class ShardedQueryEngine:
+    """``QueryEngine`` over state partitions held by local worker processes.
+
+    Each shard process builds its own prefix sums, cube and scan frame for its
+    states. A query is sent to every shard that can hold matching rows, the
+    shards compute their ``QueryEngine.partial`` in parallel and the partial
+    sums are merged and finalized here, exactly as the single-process engine
+    finalizes its own partial. Results are therefore identical, including row
+    order for ties.
+
+    ``QueryContext`` memoization stays inside one process and is not used:
+    each shard evaluates a request's filters once per query.
+
+    ``positions`` are each partition's row positions in the frame it was cut
+    from (by default, the partitions in order), so ``take`` can return rows
+    of that frame without this process keeping it.
+    """
+
+    def __init__(
+        self,
+        partitions: list[pd.DataFrame],
+        age_cols: tuple[str, ...] = AGE_COLS,
+        positions: list[np.ndarray] | None = None,
+    ):
+        # Spawn rather than fork: the server process has threads running
+        context = multiprocessing.get_context("spawn")
+        self.age_cols = tuple(age_cols)
+        self.states = [frozenset(part["state"].unique()) for part in partitions]
+        self.rows = [len(part) for part in partitions]
+        if positions is None:
+            offsets = np.cumsum([0, *self.rows])
+            positions = [np.arange(lo, hi) for lo, hi in zip(offsets[:-1], offsets[1:])]
+        self.positions = positions
+        # Memory held for the shards (their processes plus positions here), known after warm_up()
+        self.nbytes = 0
+        self._shards = [
+            ProcessPoolExecutor(
+                max_workers=1, mp_context=context, initializer=_init_shard, initargs=(part, self.age_cols)
+            )
+            for part in partitions
+        ]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, shards: int, age_cols: tuple[str, ...] = AGE_COLS) -> "ShardedQueryEngine":
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        shard_of = state_shards(df, shards)
+        return cls(
+            [df[shard_of == i].reset_index(drop=True) for i in range(shards)],
+            age_cols,
+            [np.flatnonzero(shard_of == i) for i in range(shards)],
+        )
+
+    plan = staticmethod(QueryEngine.plan)
+
+    def run(self, spec: QuerySpec, context: QueryContext | None = None) -> QueryResult:
+        dims, _ = validate_spec(spec, self.age_cols)
+        wanted = set(spec.filters.states) if spec.filters.states else None
+        targets = [shard for shard, states in zip(self._shards, self.states) if wanted is None or states & wanted]
+        # Still ask one shard when none can match, for a correctly typed empty result
+        targets = targets or self._shards[:1]
+
+        with phase("aggregate"):
+            futures = [shard.submit(_shard_partial, spec) for shard in targets]
+            parts = [f.result() for f in futures]
+            merged = merge_partials(parts, dims)
+        return finalize(merged, spec, self.age_cols)
+
+    def take(self, positions: np.ndarray) -> pd.DataFrame:
+        """Rows at ``positions`` of the partitioned frame, in that order, with a fresh index."""
+
+        positions = np.asarray(positions, dtype=np.int64)
+        futures, slots = [], []
+        for shard, own in zip(self._shards, self.positions):
+            if not len(own):
+                continue
+            local = np.searchsorted(own, positions)
+            hit = local < len(own)
+            hit[hit] = own[local[hit]] == positions[hit]
+            if hit.any():
+                futures.append(shard.submit(_shard_take, local[hit]))
+                slots.append(np.flatnonzero(hit))
+        if not futures:
+            return self._shards[0].submit(_shard_take, np.array([], dtype=np.int64)).result().reset_index(drop=True)
+
+        out = pd.concat([f.result() for f in futures], ignore_index=True)
+        return out.take(np.argsort(np.concatenate(slots), kind="stable")).reset_index(drop=True)
+
+    def warm_up(self) -> None:
+        """Block until every shard process has loaded its partition, and record their size."""
+
+        held = sum(f.result() for f in [shard.submit(_shard_nbytes) for shard in self._shards])
+        self.nbytes = held + sum(p.nbytes for p in self.positions)
+
+    def close(self) -> None:
+        """Stop the shard processes once the queries already submitted finish."""
+
+        for shard in self._shards:
+            shard.shutdown(wait=False)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class DatasetStats:
+    """Dataset-level figures computed once when a cleaned frame is loaded.
+
+    ``district_totals`` holds the total enrolments per district name sorted
+    ascending, so the number of districts at or above any threshold is a
+    binary search instead of a group-by.
+    """
+
+    total_records: int
+    total_enrollments: int
+    states: int
+    districts: int
+    date_start: str | None
+    date_end: str | None
+    district_totals: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "DatasetStats":
+        if df.empty:
+            return cls(0, 0, 0, 0, None, None, np.array([], dtype=float))
+
+        totals = np.sort(df.groupby("district", sort=False)["total_enrolments"].sum().to_numpy(dtype=float))
+        return cls(
+            total_records=int(len(df)),
+            total_enrollments=int(df["total_enrolments"].sum()),
+            states=int(df["state"].nunique()),
+            districts=int(len(totals)),
+            date_start=df["date"].min().strftime("%Y-%m-%d"),
+            date_end=df["date"].max().strftime("%Y-%m-%d"),
+            district_totals=totals,
+        )
+
+    def districts_active(self, min_total: int) -> int:
+        """Count districts whose total enrolments are at least ``min_total``."""
+
+        if min_total <= 0:
+            return self.districts
+        return int(len(self.district_totals) - np.searchsorted(self.district_totals, min_total, side="left"))
+
+    def date_range(self) -> dict[str, str | None]:
+        return {"start": self.date_start, "end": self.date_end}
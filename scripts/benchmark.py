@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend import cleaning
+from scripts.generate_synthetic_data import generate_raw_dataframe
+
+# Cleaning stages in pipeline order, mirroring clean_dataframe
+STAGES: tuple[tuple[str, Callable[[pd.DataFrame], pd.DataFrame]], ...] = (
+    ("standardize", cleaning._standardize_and_validate),
+    ("dropna", cleaning._drop_missing_identifiers),
+    ("parse_dates", cleaning._parse_dates),
+    ("normalize", cleaning._normalize_identifiers),
+    ("coerce_counts", cleaning._coerce_age_counts),
+    ("drop_unknown", cleaning._drop_unknown_identifiers),
+    ("merge_variants", cleaning._merge_rare_district_variants),
+    ("group_by", cleaning._aggregate_duplicates),
+    ("totals", cleaning._add_totals),
+    ("time_dims", cleaning._add_time_dimensions),
+)
+
+# The default size; smaller frames may have no rare variants to merge
+MIN_MERGE_ROWS = 100_000
+
+
+def _measure(fn: Callable[[], object], repeat: int) -> dict:
+    """Median/min wall time over ``repeat`` runs plus one traced run for peak memory."""
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def bench_cleaning(raw: pd.DataFrame, repeat: int) -> dict[str, dict]:
+    out: dict[str, dict] = {}
+
+    # Feed each stage the previous stage's output so it sees realistic input
+    df = raw
+    for name, stage in STAGES:
+        src = df
+        out[f"clean.{name}"] = _measure(lambda: stage(src.copy()), repeat)
+        df = stage(src.copy())
+        if name == "merge_variants":
+            merged = int((src["district"] != df["district"]).sum())
+            out["clean.merge_variants"]["merged_rows"] = merged
+            _check_merges(len(raw), merged)
+
+    out["clean.total"] = _measure(lambda: cleaning.clean_dataframe_with_report(raw), repeat)
+    return out
+
+
+def _check_merges(rows: int, merged: int) -> None:
+    """Make sure the merge_variants timing covers real merges, not just the lookup."""
+
+    if merged:
+        return
+    message = f"merge_variants merged no district variants at {rows:,} rows"
+    if rows >= MIN_MERGE_ROWS:
+        raise RuntimeError(f"{message}; the synthetic generator no longer produces mergeable variants")
+    print(f"  note: {message}; its timing does not include a merge")
+
+
+def bench_filter(cleaned: pd.DataFrame, repeat: int) -> dict[str, dict]:
+    params = _filter_params(cleaned)
+    return {
+        "filter_df.dates_states": _measure(
+            lambda: cleaning.filter_df(
+                cleaned, start=params["start"], end=params["end"], states=params["states"], districts=None, search=None
+            ),
+            repeat,
+        ),
+        "filter_df.search": _measure(
+            lambda: cleaning.filter_df(
+                cleaned, start=None, end=None, states=None, districts=None, search=params["search"]
+            ),
+            repeat,
+        ),
+    }
+
+
+def _filter_params(cleaned: pd.DataFrame) -> dict:
+    start = cleaned["date"].min() + pd.Timedelta(days=30)
+    end = cleaned["date"].max() - pd.Timedelta(days=30)
+    top = cleaned["state"].value_counts().index[:2].tolist()
+    return {
+        "start": start.strftime("%Y-%m-%d"),
+        "end": end.strftime("%Y-%m-%d"),
+        "states": top,
+        "search": str(cleaned["district"].iloc[0]).split(" ")[0],
+    }
+
+
+def bench_api(csv_path: Path, cleaned: pd.DataFrame, repeat: int) -> dict[str, dict]:
+    """Time dataset load and every /api handler through the ASGI app.
+
+    Requires ``httpx`` for ``fastapi.testclient``.
+    """
+
+    from fastapi.testclient import TestClient
+
+    os.environ["UIDAI_DATA_CSV"] = str(csv_path)
+    # Time the handlers themselves: with the response cache every repeat would be a hit
+    os.environ["UIDAI_RESPONSE_CACHE_MB"] = "0"
+    if "backend.main" in sys.modules:
+        main = sys.modules["backend.main"]
+    else:
+        import backend.main as main
+
+    out = {"api.load": _measure(main._load_default_dataset, 1)}
+
+    params = _filter_params(cleaned)
+    query = "&".join(
+        [f"start={params['start']}", f"end={params['end']}"]
+        + [f"states={s}" for s in params["states"]]
+    )
+    filters = {"start": params["start"], "end": params["end"], "states": params["states"]}
+
+    client = TestClient(main.app)
+    requests: dict[str, Callable[[], object]] = {
+        "api.summary": lambda: client.get("/api/summary?district_min_total=285"),
+        "api.cleaning_report": lambda: client.get("/api/cleaning_report?district_min_total=285"),
+        "api.data": lambda: client.get("/api/data?limit=10000"),
+        "api.filtered_summary": lambda: client.get(f"/api/filtered_summary?{query}&district_min_total=285"),
+        "api.filtered_summary.search": lambda: client.get(f"/api/filtered_summary?search={params['search']}"),
+        "api.state_totals": lambda: client.get(f"/api/state_totals?{query}"),
+        "api.district_totals": lambda: client.get(f"/api/district_totals?{query}"),
+        "api.compare": lambda: client.get("/api/compare"),
+        "api.action_recommendations": lambda: client.get(f"/api/action_recommendations?{query}"),
+        "api.batch": lambda: client.post(
+            "/api/batch",
+            json={
+                "filters": {**filters, "district_min_total": 285},
+                "queries": [
+                    {"name": "filtered_summary", "type": "filtered_summary"},
+                    {"name": "state_totals", "type": "state_totals"},
+                    {"name": "action_recommendations", "type": "action_recommendations"},
+                ],
+            },
+        ),
+        "api.query.monthly": lambda: client.post(
+            "/api/query", json={"filters": filters, "group_by": ["month", "state"], "metrics": ["total"]}
+        ),
+    }
+    for name, call in requests.items():
+        resp = call()
+        if resp.status_code != 200:
+            raise RuntimeError(f"{name} returned {resp.status_code}: {resp.text[:200]}")
+        out[name] = _measure(call, repeat)
+    return out
+
+
+def run(rows: int, repeat: int, seed: int, skip_api: bool) -> dict[str, dict]:
+    raw = generate_raw_dataframe(rows, seed=seed)
+    results = bench_cleaning(raw, repeat)
+
+    cleaned = cleaning.clean_dataframe(raw)
+    results.update(bench_filter(cleaned, repeat))
+
+    if not skip_api:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "bench.csv"
+            raw.to_csv(csv_path, index=False)
+            results.update(bench_api(csv_path, cleaned, repeat))
+
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print a ratio table and return the names that regressed beyond ``tolerance``."""
+
+    regressions = []
+    for size, results in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            print(f"\n[{size} rows] no baseline")
+            continue
+        print(f"\n[{size} rows] current vs baseline (median)")
+        for name, m in results.items():
+            b = base.get(name)
+            if not b or not b["median_s"]:
+                continue
+            ratio = m["median_s"] / b["median_s"]
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressions.append(f"{size}:{name}")
+            print(f"  {name:<32} {b['median_s'] * 1e3:>10.2f}ms -> {m['median_s'] * 1e3:>10.2f}ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cleaning stages, filter_df and /api handlers")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[100_000],
+        help="Synthetic dataset sizes to run, e.g. --rows 100000 1000000 10000000 (default: 100000)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement (default: 3)")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed (default: 42)")
+    parser.add_argument("--skip-api", action="store_true", help="Only benchmark cleaning and filter_df")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const=str(Path("benchmarks") / "baseline.json"),
+        help="Store results as the baseline (default path: benchmarks/baseline.json)",
+    )
+    parser.add_argument("--compare", help="Baseline JSON to compare against; exits 1 on regression")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown vs baseline before flagging, as a fraction (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    # The date fallback parser warns per run; keep the output readable
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+
+    for rows in args.rows:
+        print(f"\n[{rows} rows]")
+        results = run(rows, args.repeat, args.seed, args.skip_api)
+        report["results"][str(rows)] = results
+        for name, m in results.items():
+            merged = f", merged {m['merged_rows']:,} rows" if "merged_rows" in m else ""
+            print(
+                f"  {name:<32} {m['median_s'] * 1e3:>10.2f}ms  "
+                f"(min {m['min_s'] * 1e3:.2f}ms, peak {m['peak_mb']:.1f}MB{merged})"
+            )
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        out_path = Path(path).resolve()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote: {out_path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
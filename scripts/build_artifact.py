@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.datasets import DATASETS, DEFAULT_DATASET, dictionary_path
+from backend.districts import DistrictDictionary
+from backend.serving import ServingDataset, read_artifact, write_artifact
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prebuild the API's serving artifact from the raw CSV")
+    parser.add_argument(
+        "--dataset",
+        choices=sorted(DATASETS),
+        default=DEFAULT_DATASET,
+        help=f"Dataset to build (default: {DEFAULT_DATASET})",
+    )
+    parser.add_argument(
+        "--input",
+        help="Input CSV path (default: the dataset's CSV, e.g. data/api_data_aadhar_enrolment.csv)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Artifact path (default: where the backend looks for it, e.g. data/serving.pkl)",
+    )
+    parser.add_argument(
+        "--district-dictionary",
+        help=(
+            "District dictionary to apply, if it exists (default: the backend's, "
+            "UIDAI_DISTRICT_DICTIONARY or data/district_dictionary.json)"
+        ),
+    )
+    args = parser.parse_args()
+
+    schema = DATASETS[args.dataset]
+    in_path = Path(args.input).resolve() if args.input else schema.csv_path()
+    out_path = Path(args.output).resolve() if args.output else schema.artifact_path()
+    dict_path = Path(args.district_dictionary).resolve() if args.district_dictionary else dictionary_path()
+    dictionary = DistrictDictionary.load(dict_path) if dict_path.exists() else None
+
+    t0 = time.perf_counter()
+    dataset = ServingDataset.from_csv(in_path, district_dictionary=dictionary, age_cols=schema.age_cols)
+    write_artifact(dataset, out_path, source=in_path, dictionary=dict_path if dictionary else None)
+    built = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    read_artifact(out_path, source=in_path, dictionary=dict_path)
+    loaded = time.perf_counter() - t0
+
+    print(f"Rows:   {len(dataset.df):,}")
+    print(f"Built:  {built:.2f}s from {in_path.name}")
+    print(f"Load:   {loaded:.3f}s ({out_path.stat().st_size / 1e6:.1f} MB)")
+    print(f"Wrote:  {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def bound_cases(first: pd.Timestamp, last: pd.Timestamp) -> list[tuple[str, dict, dict]]:
+    """(label, far filter, equivalent filter inside the data's date range)."""
+
+    day = pd.Timedelta(days=1)
+    first, last = first.date().isoformat(), last.date().isoformat()
+    return [
+        ("end far future", {"end": "9999-12-31"}, {"end": last}),
+        ("end past ns range", {"end": "2262-04-12"}, {"end": last}),
+        ("end 3000", {"end": "3000-01-01"}, {"end": last}),
+        ("start far past", {"start": "0001-01-01"}, {"start": first}),
+        ("start 1600", {"start": "1600-01-01"}, {"start": first}),
+        ("both far", {"start": "1600-01-01", "end": "9999-12-31"}, {"start": first, "end": last}),
+        ("start after data", {"start": "3000-01-01"}, {"start": (pd.Timestamp(last) + day).date().isoformat()}),
+        ("end before data", {"end": "1600-01-01"}, {"end": (pd.Timestamp(first) - day).date().isoformat()}),
+    ]
+
+
+def requests_for(filters: dict) -> dict[str, tuple[str, str, dict]]:
+    """Every endpoint answered from prefix sums or the state/date cube, as (method, path, params or body)."""
+
+    return {
+        "filtered_summary": ("GET", "/api/filtered_summary", filters),
+        "state_totals": ("GET", "/api/state_totals", filters),
+        "district_totals": ("GET", "/api/district_totals", filters),
+        "query.state": (
+            "POST", "/api/query", {"filters": filters, "group_by": ["state"], "metrics": ["total", "rows"]}
+        ),
+        "query.month": ("POST", "/api/query", {"filters": filters, "group_by": ["month"], "metrics": ["total"]}),
+        "query.date_state": (
+            "POST", "/api/query", {"filters": filters, "group_by": ["date", "state"], "metrics": ["total", "rows"]}
+        ),
+        "action_recommendations": ("GET", "/api/action_recommendations", filters),
+        "batch": (
+            "POST",
+            "/api/batch",
+            {
+                "filters": filters,
+                "queries": [
+                    {"name": "filtered_summary", "type": "filtered_summary"},
+                    {"name": "state_totals", "type": "state_totals"},
+                    {"name": "district_totals", "type": "district_totals"},
+                    {"name": "action_recommendations", "type": "action_recommendations"},
+                ],
+            },
+        ),
+    }
+
+
+# /api/compare derives a previous period, which may leave the supported calendar
+COMPARE_CASES: list[tuple[dict, int]] = [
+    ({"start": "1000-01-01", "end": "2024-02-01"}, 400),
+    ({"mode": "same_period_last_year", "start": "0001-01-01", "end": "0001-06-01"}, 400),
+    ({"start": "1600-01-01", "end": "9999-12-31"}, 400),
+    ({"start": "1600-01-01", "end": "2025-12-31"}, 200),
+    ({"end": "9999-12-31"}, 200),
+    ({"mode": "same_period_last_year", "start": "1600-01-01"}, 200),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check far-past and far-future date filters against in-range ones")
+    parser.add_argument("--input", help="Raw CSV to serve (default: the backend's enrolment CSV)")
+    args = parser.parse_args()
+
+    if args.input:
+        os.environ["UIDAI_DATA_CSV"] = str(Path(args.input).resolve())
+    # Compare freshly computed responses, not cached bodies
+    os.environ["UIDAI_RESPONSE_CACHE_MB"] = "0"
+
+    from fastapi.testclient import TestClient
+
+    import backend.main as main
+
+    failures = 0
+    with TestClient(main.app, raise_server_exceptions=False) as client:
+        stats = main.datasets.get(main.DEFAULT_DATASET).stats
+
+        def fetch(method: str, path: str, payload: dict):
+            resp = client.get(path, params=payload) if method == "GET" else client.post(path, json=payload)
+            return resp.status_code, resp.json()
+
+        for label, far, near in bound_cases(pd.Timestamp(stats.date_start), pd.Timestamp(stats.date_end)):
+            expected = requests_for(near)
+            for name, (method, path, payload) in requests_for(far).items():
+                got = fetch(method, path, payload)
+                want = fetch(*expected[name])
+                if got != want:
+                    failures += 1
+                    print(f"  mismatch: {name} {label}: {far} -> {got[0]}, {near} -> {want[0]}")
+
+        for params, status in COMPARE_CASES:
+            got = client.get("/api/compare", params=params).status_code
+            if got != status:
+                failures += 1
+                print(f"  compare {params}: {got}, expected {status}")
+
+    print(f"{'OK' if not failures else f'{failures} mismatches'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
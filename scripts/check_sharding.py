@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.datasets import DATASETS, DEFAULT_DATASET
+from backend.query import QueryEngine, QueryFilters, QuerySort, QuerySpec
+from backend.serving import ServingDataset, read_artifact
+from backend.sharding import ShardedQueryEngine
+
+DIMENSIONS: tuple[str, ...] = ("date", "week", "month", "state", "district", "day_of_week")
+
+
+def random_specs(df, age_cols: tuple[str, ...], count: int, seed: int) -> list[QuerySpec]:
+    """Queries over every plan: all one- and two-dimension groupings, with random filters."""
+
+    rng = random.Random(seed)
+    states = sorted(df["state"].unique())
+    districts = sorted(df["district"].unique())
+    dates = sorted(df["date"].dt.strftime("%Y-%m-%d").unique())
+    groupings = [[], *([d] for d in DIMENSIONS), *(list(p) for p in itertools.combinations(DIMENSIONS, 2))]
+
+    specs = []
+    for i in range(count):
+        group_by = groupings[i % len(groupings)]
+        start, end = sorted(rng.sample(dates, 2)) if rng.random() < 0.5 and len(dates) > 1 else (None, None)
+        filters = QueryFilters(
+            start=start,
+            end=end,
+            states=rng.sample(states, min(len(states), rng.randint(1, 3))) if rng.random() < 0.4 else None,
+            districts=rng.sample(districts, min(len(districts), rng.randint(1, 3))) if rng.random() < 0.2 else None,
+            search=rng.choice(districts)[:4] if rng.random() < 0.15 else None,
+        )
+        metrics = ["total", "rows", *rng.sample(age_cols, rng.randint(0, len(age_cols)))]
+        sort = QuerySort(by=rng.choice(metrics + group_by), descending=rng.random() < 0.7) if rng.random() < 0.6 else None
+        specs.append(
+            QuerySpec(
+                filters=filters,
+                group_by=group_by,
+                metrics=metrics,
+                age_groups=rng.sample(age_cols, rng.randint(1, len(age_cols))) if rng.random() < 0.3 else None,
+                sort=sort,
+                limit=rng.randint(1, 50) if sort and rng.random() < 0.5 else None,
+            )
+        )
+    return specs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that sharded queries match the single-process engine")
+    parser.add_argument(
+        "--dataset",
+        choices=sorted(DATASETS),
+        default=DEFAULT_DATASET,
+        help=f"Dataset whose schema the input follows (default: {DEFAULT_DATASET})",
+    )
+    parser.add_argument(
+        "--input",
+        help="Raw CSV or serving artifact (.pkl) (default: the dataset's CSV, e.g. data/api_data_aadhar_enrolment.csv)",
+    )
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 3], help="Shard counts to check (default: 2 3)")
+    parser.add_argument("--queries", type=int, default=500, help="Random queries per shard count (default: 500)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    schema = DATASETS[args.dataset]
+    in_path = Path(args.input).resolve() if args.input else schema.csv_path()
+    if in_path.suffix == ".pkl":
+        dataset = read_artifact(in_path)
+    else:
+        dataset = ServingDataset.from_csv(in_path, age_cols=schema.age_cols)
+    single = QueryEngine.from_frame(dataset.df, schema.age_cols)
+    specs = random_specs(dataset.df, schema.age_cols, args.queries, args.seed)
+    expected = [single.run(spec).records() for spec in specs]
+
+    failures = 0
+    for shards in args.shards:
+        engine = ShardedQueryEngine.from_frame(dataset.df, shards, schema.age_cols)
+        try:
+            engine.warm_up()
+            t0 = time.perf_counter()
+            mismatched = [spec for spec, want in zip(specs, expected) if engine.run(spec).records() != want]
+            elapsed = time.perf_counter() - t0
+            # Rows fetched from the shards must match the unpartitioned frame, in the requested order
+            rng = np.random.default_rng(args.seed)
+            take_failures = sum(
+                not engine.take(positions).equals(dataset.df.take(positions).reset_index(drop=True))
+                for positions in (
+                    np.arange(len(dataset.df)),
+                    rng.permutation(len(dataset.df))[: max(1, len(dataset.df) // 10)],
+                    np.array([], dtype=np.int64),
+                )
+            )
+        finally:
+            engine.close()
+
+        rows = ", ".join(f"{n:,}" for n in engine.rows)
+        print(f"{shards} shards ({rows} rows): {len(specs) - len(mismatched)}/{len(specs)} identical in {elapsed:.2f}s")
+        for spec in mismatched[:5]:
+            print(f"  mismatch: {spec.model_dump_json()}")
+        if take_failures:
+            print(f"  {take_failures} row fetches differ from the unpartitioned frame")
+        failures += len(mismatched) + take_failures
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
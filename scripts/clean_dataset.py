@@ -10,20 +10,26 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from backend.cleaning import clean_dataframe
+from backend.cleaning import clean_dataframe, clean_dataframe_with_report, learn_district_dictionary
+from backend.datasets import DATASETS, DEFAULT_DATASET, dictionary_path
+from backend.districts import DistrictDictionary
 
 
 def main() -> int:
-    parser = argparse.ArgumentParser(description="Logically clean Aadhaar enrollment CSV")
+    parser = argparse.ArgumentParser(description="Logically clean an Aadhaar enrolment, demographic or biometric CSV")
+    parser.add_argument(
+        "--dataset",
+        choices=sorted(DATASETS),
+        default=DEFAULT_DATASET,
+        help=f"Feed whose schema the input follows (default: {DEFAULT_DATASET})",
+    )
     parser.add_argument(
         "--input",
-        default=str(Path("data") / "api_data_aadhar_enrolment.csv"),
-        help="Input CSV path (default: data/api_data_aadhar_enrolment.csv)",
+        help="Input CSV path (default: the dataset's CSV, e.g. data/api_data_aadhar_enrolment.csv)",
     )
     parser.add_argument(
         "--output",
-        default=str(Path("data") / "api_data_aadhar_enrolment.cleaned.csv"),
-        help="Output CSV path (default: data/api_data_aadhar_enrolment.cleaned.csv)",
+        help="Output CSV path (default: the input path ending in .cleaned.csv instead of .csv)",
     )
     parser.add_argument(
         "--no-merge-rare-districts",
@@ -48,21 +54,63 @@ def main() -> int:
         default=0.92,
         help="Similarity threshold for merging (default: 0.92)",
     )
+    parser.add_argument(
+        "--district-dictionary",
+        help=(
+            "District dictionary to apply, if it exists (default: the backend's, "
+            "UIDAI_DISTRICT_DICTIONARY or data/district_dictionary.json)"
+        ),
+    )
+    parser.add_argument(
+        "--learn-dictionary",
+        action="store_true",
+        help="Add this input's unseen districts to the dictionary (creating it if needed) before cleaning",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time, CPU time and traced memory for each cleaning stage",
+    )
     args = parser.parse_args()
 
-    in_path = Path(args.input).resolve()
-    out_path = Path(args.output).resolve()
+    schema = DATASETS[args.dataset]
+    in_path = Path(args.input).resolve() if args.input else schema.csv_path()
+    out_path = Path(args.output or in_path.with_name(in_path.stem + ".cleaned.csv")).resolve()
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    raw = pd.read_csv(in_path)
-    cleaned = clean_dataframe(
-        raw,
+    options = dict(
+        age_cols=schema.age_cols,
         merge_rare_district_variants=not args.no_merge_rare_districts,
         rare_max_occ=args.rare_max_occ,
         candidate_min_occ=args.candidate_min_occ,
         similarity_threshold=args.similarity,
     )
 
+    raw = pd.read_csv(in_path)
+
+    dict_path = Path(args.district_dictionary).resolve() if args.district_dictionary else dictionary_path()
+    dictionary = DistrictDictionary.load(dict_path) if dict_path.exists() else None
+    if args.learn_dictionary:
+        learned = learn_district_dictionary(
+            raw,
+            dictionary,
+            rare_max_occ=args.rare_max_occ,
+            candidate_min_occ=args.candidate_min_occ,
+            similarity_threshold=args.similarity,
+            age_cols=schema.age_cols,
+        )
+        if learned is not dictionary:
+            added = len(learned.index) - (len(dictionary.index) if dictionary else 0)
+            learned.save(dict_path)
+            print(f"Dictionary:  +{added:,} entries, revision {learned.revision} -> {dict_path}")
+        dictionary = learned
+    options["district_dictionary"] = dictionary
+
+    if args.profile:
+        cleaned, report = clean_dataframe_with_report(raw, profile_memory=True, **options)
+    else:
+        cleaned = clean_dataframe(raw, **options)
+
     cleaned.to_csv(out_path, index=False)
 
     print(f"Input rows:  {len(raw):,}")
@@ -72,6 +120,16 @@ def main() -> int:
     print(f"Date range:  {cleaned['date'].min().date()} → {cleaned['date'].max().date()}")
     print(f"Wrote:       {out_path}")
 
+    if args.profile:
+        print()
+        print(f"{'stage':<18}{'rows in':>12}{'rows out':>12}{'wall ms':>11}{'cpu ms':>11}{'peak MB':>10}{'net MB':>10}")
+        for st in report["stage_profile"]:
+            print(
+                f"{st['stage']:<18}{st['rows_in']:>12,}{st['rows_out']:>12,}{st['wall_ms']:>11.1f}"
+                f"{st['cpu_ms']:>11.1f}{st['peak_mem_mb']:>10.1f}{st['mem_delta_mb']:>10.1f}"
+            )
+        print(f"{'total':<42}{report['profile_total_wall_ms']:>11.1f}")
+
     return 0
 
 
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Raw spellings as they appear in the UIDAI feeds, including the variants the
+# cleaner has to normalize.
+STATES: tuple[str, ...] = (
+    "Andhra Pradesh",
+    "Assam",
+    "Bihar",
+    "Chhattisgarh",
+    "Gujarat",
+    "Haryana",
+    "Jharkhand",
+    "Karnataka",
+    "Kerala",
+    "Madhya Pradesh",
+    "Maharashtra",
+    "Odisha",
+    "Punjab",
+    "Rajasthan",
+    "Tamil Nadu",
+    "Telangana",
+    "Uttar Pradesh",
+    "West Bengal",
+    "Jammu And Kashmir",
+    "Andaman And Nicobar Islands",
+    "NCT Of Delhi",
+    "Puducherry",
+)
+STATE_VARIANTS: dict[str, tuple[str, ...]] = {
+    "Odisha": ("Orissa", "ODISHA"),
+    "West Bengal": ("Westbengal", "West Bangal", "west bengal"),
+    "Jammu And Kashmir": ("Jammu & Kashmir",),
+    "Andaman And Nicobar Islands": ("Andaman & Nicobar Islands",),
+    "NCT Of Delhi": ("Delhi",),
+    "Puducherry": ("Pondicherry",),
+}
+
+_PREFIXES = ("Ra", "Su", "Ka", "Ma", "Ba", "Da", "Na", "Sa", "Pa", "Ha", "Ja", "Va", "Ga", "Ta", "Bha", "Cha")
+_MIDDLES = ("ja", "ra", "ma", "la", "na", "ka", "sa", "dha", "pu", "ga", "ri", "ve")
+_SUFFIXES = ("pur", "garh", "nagar", "bad", "ganj", "pet", "halli", "wadi", "kot", "gram")
+_REGIONS = ("Dakshin", "Uttar", "Purba", "Paschim", "Madhya")
+
+BAD_DATES: tuple[str, ...] = ("31-02-2024", "not a date", "", "00-00-0000")
+
+# Mean count per row for each feed's measure columns (see backend/datasets.py)
+MEASURE_RATES: dict[str, dict[str, float]] = {
+    "enrolment": {"age_0_5": 6.0, "age_5_17": 3.0, "age_18_greater": 0.6},
+    "demographic": {"demo_age_5_17": 2.5, "demo_age_17_": 9.0},
+    "biometric": {"bio_age_5_17": 7.0, "bio_age_17_": 4.0},
+}
+
+
+def _district_names(rng: np.random.Generator, n_states: int, districts_per_state: int) -> list[list[str]]:
+    out = []
+    for _ in range(n_states):
+        names: set[str] = set()
+        while len(names) < districts_per_state:
+            name = rng.choice(_PREFIXES) + rng.choice(_MIDDLES) + rng.choice(_SUFFIXES)
+            kind = rng.random()
+            if kind < 0.3:
+                # Multi-word names, like "Dakshin Bastar Dantewada"
+                second = rng.choice(_PREFIXES) + rng.choice(_MIDDLES) + rng.choice(_SUFFIXES)
+                name = f"{rng.choice(_REGIONS)} {name} {second}"
+            elif kind < 0.45:
+                name = f"{name} {rng.choice(('North', 'South', 'East', 'West', 'Rural', 'Urban'))}"
+            names.add(name)
+        out.append(sorted(names))
+    return out
+
+
+def _typo(rng: np.random.Generator, name: str) -> str:
+    """Drop or double one letter inside one word of ``name``."""
+
+    words = name.split(" ")
+    long_words = [j for j, w in enumerate(words) if len(w) >= 4] or [0]
+    j = long_words[int(rng.integers(0, len(long_words)))]
+    word = words[j]
+    i = int(rng.integers(1, max(2, len(word) - 1)))
+    words[j] = word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+    return " ".join(words)
+
+
+def _district_variants(rng: np.random.Generator, name: str) -> list[str]:
+    """Raw spellings of one district: canonical first, then noisy variants."""
+
+    return [
+        name,
+        name.upper(),
+        f"{name} District",
+        f" {name}  ",
+        name.replace(" ", " & ") if " " in name else f"{name} & Suburbs",
+        _typo(rng, name),
+    ]
+
+
+def generate_raw_dataframe(
+    rows: int,
+    *,
+    states: int = 22,
+    districts_per_state: int = 35,
+    start: str = "2025-03-01",
+    days: int = 180,
+    noise: float = 0.02,
+    duplicate_rate: float = 0.01,
+    seed: int = 42,
+    dataset: str = "enrolment",
+) -> pd.DataFrame:
+    """Generate a deterministic raw frame shaped like a UIDAI feed's CSV.
+
+    ``dataset`` picks the feed's measure columns from ``MEASURE_RATES``.
+
+    ``noise`` is the fraction of rows that receive each kind of defect: state
+    spelling variants, district variants (case, ``District`` labels, padding,
+    ``&``, typos), comma-formatted counts and unparseable dates. About a tenth
+    of the remaining date noise uses an alternative ``YYYY/MM/DD`` format that
+    only the fallback parser accepts. ``duplicate_rate`` of rows are repeated
+    verbatim. The same arguments always produce the same frame.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_states = max(1, min(int(states), len(STATES)))
+    state_names = list(STATES[:n_states])
+    districts = _district_names(rng, n_states, max(1, int(districts_per_state)))
+
+    # Skewed activity: a few states/districts dominate, as in the real feed
+    state_w = rng.pareto(1.5, n_states) + 0.2
+    state_idx = rng.choice(n_states, size=rows, p=state_w / state_w.sum())
+    district_w = rng.pareto(1.2, districts_per_state) + 0.05
+    district_idx = rng.choice(districts_per_state, size=rows, p=district_w / district_w.sum())
+
+    # Per-(state, district) raw spellings, flattened for vectorized lookup
+    n_variants = 6
+    variant_table = np.array(
+        [v for st in districts for name in st for v in _district_variants(rng, name)], dtype=object
+    ).reshape(n_states, districts_per_state, n_variants)
+    variant_idx = np.where(rng.random(rows) < noise, rng.integers(1, n_variants, rows), 0)
+    # Typos stay rare, as the rare-variant merge expects. Only typos in names of
+    # three or more words keep enough shared words to be merged back
+    variant_idx = np.where((variant_idx == n_variants - 1) & (rng.random(rows) < 0.9), 0, variant_idx)
+    district_col = variant_table[state_idx, district_idx, variant_idx]
+
+    state_col = np.array(state_names, dtype=object)[state_idx]
+    noisy_state = rng.random(rows) < noise
+    for i, name in enumerate(state_names):
+        variants = STATE_VARIANTS.get(name)
+        if not variants:
+            continue
+        hit = noisy_state & (state_idx == i)
+        state_col[hit] = np.array(variants, dtype=object)[rng.integers(0, len(variants), int(hit.sum()))]
+
+    dates = pd.date_range(start, periods=max(1, int(days)), freq="D")
+    day_idx = rng.integers(0, len(dates), rows)
+    date_col = np.array(dates.strftime("%d-%m-%Y"), dtype=object)[day_idx]
+    alt_col = np.array(dates.strftime("%Y/%m/%d"), dtype=object)[day_idx]
+    date_noise = rng.random(rows)
+    date_col = np.where(date_noise < noise * 0.1, alt_col, date_col)
+    bad = date_noise > 1 - noise * 0.1
+    date_col[bad] = np.array(BAD_DATES, dtype=object)[rng.integers(0, len(BAD_DATES), int(bad.sum()))]
+
+    scale = rng.lognormal(0.0, 1.0, rows)
+    counts = {col: rng.poisson(rate * scale) for col, rate in MEASURE_RATES[dataset].items()}
+
+    df = pd.DataFrame(
+        {
+            "date": date_col,
+            "state": state_col,
+            "district": district_col,
+            "pincode": rng.integers(110001, 855118, rows),
+            **counts,
+        }
+    )
+
+    # Large bulk-camp rows get thousands separators, which forces object dtype
+    big = rng.random(rows) < noise
+    for col in counts:
+        values = df[col].to_numpy()
+        boosted = np.where(big, values * 250 + 1000, values)
+        df[col] = boosted.astype(object)
+        df.loc[big, col] = [f"{v:,}" for v in boosted[big]]
+
+    if duplicate_rate > 0 and rows:
+        dup = rng.choice(rows, size=int(rows * duplicate_rate), replace=False)
+        df = pd.concat([df, df.iloc[np.sort(dup)]], ignore_index=True)
+
+    return df
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Aadhaar enrolment, demographic or biometric CSV")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows before duplicates (default: 100000)")
+    parser.add_argument("--states", type=int, default=22, help=f"Number of states (max {len(STATES)}, default: 22)")
+    parser.add_argument("--districts", type=int, default=35, help="Districts per state (default: 35)")
+    parser.add_argument("--start", default="2025-03-01", help="First date, YYYY-MM-DD (default: 2025-03-01)")
+    parser.add_argument("--days", type=int, default=180, help="Date span in days (default: 180)")
+    parser.add_argument("--noise", type=float, default=0.02, help="Fraction of rows per defect type (default: 0.02)")
+    parser.add_argument("--duplicates", type=float, default=0.01, help="Fraction of rows duplicated (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument(
+        "--dataset", choices=sorted(MEASURE_RATES), default="enrolment", help="Feed to imitate (default: enrolment)"
+    )
+    parser.add_argument(
+        "--output",
+        default=str(Path("data") / "synthetic_enrolment.csv"),
+        help="Output CSV path (default: data/synthetic_enrolment.csv)",
+    )
+    args = parser.parse_args()
+
+    df = generate_raw_dataframe(
+        args.rows,
+        states=args.states,
+        districts_per_state=args.districts,
+        start=args.start,
+        days=args.days,
+        noise=args.noise,
+        duplicate_rate=args.duplicates,
+        seed=args.seed,
+        dataset=args.dataset,
+    )
+
+    out_path = Path(args.output).resolve()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out_path, index=False)
+
+    print(f"Rows:   {len(df):,}")
+    print(f"Wrote:  {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+AGE_GROUPS = ("age_0_5", "age_5_17", "age_18_greater")
+DISTRICT_MIN_TOTAL_FOR_COUNT = 285  # Mirrors Dashboard.jsx
+
+# Latency histogram bucket upper bounds in milliseconds
+BUCKETS_MS: tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+
+class Catalog:
+    """States, districts and dates the traffic generator samples from."""
+
+    def __init__(self, start: str, end: str, states: list[str], districts: list[tuple[str, str]]):
+        self.start = time.mktime(time.strptime(start, "%Y-%m-%d"))
+        self.end = time.mktime(time.strptime(end, "%Y-%m-%d"))
+        self.states = states
+        self.districts = districts
+        self.terms = sorted({tok for _, d in districts for tok in d.split() if len(tok) > 2})
+
+    @classmethod
+    async def fetch(cls, client: httpx.AsyncClient) -> "Catalog":
+        summary = (await client.get("/api/summary")).json()
+        districts = (await client.get("/api/district_totals")).json()["districts"]
+        return cls(
+            summary["date_range"]["start"],
+            summary["date_range"]["end"],
+            sorted({d["state"] for d in districts}),
+            [(d["state"], d["district"]) for d in districts],
+        )
+
+    def random_filters(self, rng: random.Random) -> dict:
+        """One dashboard filter state, shaped like Dashboard.jsx's buildFilterSpec()."""
+
+        spec: dict = {}
+        if rng.random() < 0.7:
+            a, b = sorted(rng.uniform(self.start, self.end) for _ in range(2))
+            spec["start"] = time.strftime("%Y-%m-%d", time.localtime(a))
+            spec["end"] = time.strftime("%Y-%m-%d", time.localtime(b))
+        if self.states and rng.random() < 0.5:
+            spec["states"] = rng.sample(self.states, k=min(len(self.states), rng.randint(1, 3)))
+            if rng.random() < 0.3:
+                pool = [d for s, d in self.districts if s in spec["states"]]
+                if pool:
+                    spec["districts"] = rng.sample(pool, k=min(len(pool), rng.randint(1, 3)))
+        if self.terms and rng.random() < 0.15:
+            spec["search"] = rng.choice(self.terms)
+        groups = [g for g in AGE_GROUPS if rng.random() < 0.7]
+        spec["age_groups"] = groups or list(AGE_GROUPS)
+        return spec
+
+
+def _query_params(spec: dict) -> list[tuple[str, str]]:
+    params: list[tuple[str, str]] = []
+    for key in ("start", "end", "search"):
+        if key in spec:
+            params.append((key, spec[key]))
+    for key in ("states", "districts", "age_groups"):
+        params.extend((key, v) for v in spec.get(key, []))
+    return params
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, name: str, request) -> None:
+        t0 = time.perf_counter()
+        try:
+            resp = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return
+        self.latencies[name].append((time.perf_counter() - t0) * 1e3)
+        self.statuses[name][resp.status_code] += 1
+
+    async def span(self, name: str, work) -> None:
+        """Record the end-to-end latency of a group of requests."""
+
+        t0 = time.perf_counter()
+        await work
+        self.latencies[name].append((time.perf_counter() - t0) * 1e3)
+
+
+async def _page_load(client: httpx.AsyncClient, rec: Recorder) -> None:
+    await asyncio.gather(
+        rec.call("data", client.get("/api/data", params={"limit": 10000})),
+        rec.call("summary", client.get("/api/summary", params={"district_min_total": DISTRICT_MIN_TOTAL_FOR_COUNT})),
+        rec.call(
+            "cleaning_report",
+            client.get("/api/cleaning_report", params={"district_min_total": DISTRICT_MIN_TOTAL_FOR_COUNT}),
+        ),
+    )
+
+
+async def _filter_change(client: httpx.AsyncClient, rec: Recorder, spec: dict, mix: str) -> None:
+    """Issue what Dashboard.jsx sends after one filter change."""
+
+    if mix == "batch":
+        await rec.call(
+            "batch",
+            client.post(
+                "/api/batch",
+                json={
+                    "filters": {**spec, "district_min_total": DISTRICT_MIN_TOTAL_FOR_COUNT},
+                    "queries": [
+                        {"name": "filtered_summary", "type": "filtered_summary"},
+                        {"name": "state_totals", "type": "state_totals"},
+                        {"name": "action_recommendations", "type": "action_recommendations"},
+                    ],
+                },
+            ),
+        )
+        return
+
+    # Pre-batch dashboard: three independent GETs with the same filters
+    params = _query_params(spec)
+    await asyncio.gather(
+        rec.call(
+            "filtered_summary",
+            client.get("/api/filtered_summary", params=params + [("district_min_total", str(DISTRICT_MIN_TOTAL_FOR_COUNT))]),
+        ),
+        rec.call("state_totals", client.get("/api/state_totals", params=params)),
+        rec.call("action_recommendations", client.get("/api/action_recommendations", params=params)),
+    )
+
+
+async def _user(
+    client: httpx.AsyncClient,
+    rec: Recorder,
+    catalog: Catalog,
+    rng: random.Random,
+    deadline: float,
+    mix: str,
+    think_ms: float,
+    export_rate: float,
+) -> None:
+    await _page_load(client, rec)
+    while time.perf_counter() < deadline:
+        spec = catalog.random_filters(rng)
+        # "filter_change" is the user-visible refresh time, comparable across mixes
+        await rec.span("filter_change", _filter_change(client, rec, spec, mix))
+        if rng.random() < export_rate:
+            name = rng.choice(["state_totals", "district_totals"])
+            await rec.call(f"export.{name}", client.get(f"/api/{name}", params=_query_params(spec)))
+        if think_ms:
+            await asyncio.sleep(rng.expovariate(1.0 / think_ms) / 1e3)
+
+
+async def run_load(args: argparse.Namespace, base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        catalog = await Catalog.fetch(client)
+        rec = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *[
+                _user(client, rec, catalog, random.Random(args.seed + i), deadline, args.mix, args.think_ms, args.export_rate)
+                for i in range(args.concurrency)
+            ]
+        )
+        elapsed = time.perf_counter() - started
+
+    return summarize(rec, elapsed, args)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def summarize(rec: Recorder, elapsed: float, args: argparse.Namespace) -> dict:
+    endpoints = {}
+    for name in sorted(set(rec.latencies) | set(rec.errors)):
+        values = sorted(rec.latencies.get(name, []))
+        counts = [0] * len(BUCKETS_MS)
+        for v in values:
+            counts[next(i for i, b in enumerate(BUCKETS_MS) if v <= b)] += 1
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": rec.errors.get(name, 0),
+            "statuses": {str(k): v for k, v in sorted(rec.statuses.get(name, {}).items())},
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+            "mean_ms": statistics.fmean(values) if values else 0.0,
+            "p50_ms": _percentile(values, 50),
+            "p90_ms": _percentile(values, 90),
+            "p99_ms": _percentile(values, 99),
+            "max_ms": values[-1] if values else 0.0,
+            "histogram": {("inf" if b == float("inf") else str(b)): c for b, c in zip(BUCKETS_MS, counts)},
+        }
+
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "meta": {
+            "label": args.label,
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "duration_s": elapsed,
+            "seed": args.seed,
+        },
+        "total_requests": total,
+        "total_rps": total / elapsed if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: dict) -> None:
+    meta = result["meta"]
+    print(
+        f"\n[{meta.get('label') or 'run'}] mix={meta['mix']} concurrency={meta['concurrency']} "
+        f"workers={meta['workers']} duration={meta['duration_s']:.1f}s "
+        f"requests={result['total_requests']} ({result['total_rps']:.1f} req/s)"
+    )
+    header = f"  {'endpoint':<30} {'reqs':>7} {'rps':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  statuses"
+    print(header)
+    for name, e in result["endpoints"].items():
+        statuses = " ".join(f"{k}:{v}" for k, v in e["statuses"].items())
+        if e["errors"]:
+            statuses += f" err:{e['errors']}"
+        print(
+            f"  {name:<30} {e['requests']:>7} {e['throughput_rps']:>8.1f} {e['p50_ms']:>8.1f}ms "
+            f"{e['p90_ms']:>8.1f}ms {e['p99_ms']:>8.1f}ms {e['max_ms']:>8.1f}ms  {statuses}"
+        )
+
+    for name, e in result["endpoints"].items():
+        peak = max(e["histogram"].values()) or 1
+        print(f"\n  {name} latency histogram")
+        for bound, count in e["histogram"].items():
+            if not count:
+                continue
+            label = f"> {BUCKETS_MS[-2]:g}ms" if bound == "inf" else f"<= {float(bound):g}ms"
+            print(f"    {label:>10} {count:>7} {'#' * max(1, int(40 * count / peak))}")
+
+
+def print_comparison(base: dict, head: dict) -> None:
+    b_label = base["meta"].get("label") or "base"
+    h_label = head["meta"].get("label") or "head"
+    print(f"\nComparison: {b_label} -> {h_label}")
+    print(f"  total throughput {base['total_rps']:.1f} -> {head['total_rps']:.1f} req/s  x{_ratio(head['total_rps'], base['total_rps'])}")
+    print(f"  {'endpoint':<30} {'p50':>22} {'p99':>22} {'rps':>18}")
+    for name in sorted(set(base["endpoints"]) | set(head["endpoints"])):
+        b = base["endpoints"].get(name)
+        h = head["endpoints"].get(name)
+        if not b or not h:
+            print(f"  {name:<30} only in {'head' if h else 'base'}")
+            continue
+        print(
+            f"  {name:<30} {b['p50_ms']:>8.1f} -> {h['p50_ms']:>7.1f}ms "
+            f"{b['p99_ms']:>8.1f} -> {h['p99_ms']:>7.1f}ms "
+            f"{b['throughput_rps']:>7.1f} -> {h['throughput_rps']:>6.1f}"
+        )
+
+
+def _ratio(a: float, b: float) -> str:
+    return f"{a / b:.2f}" if b else "n/a"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(workers: int, data: str | None, startup_timeout: float) -> tuple[subprocess.Popen, str]:
+    """Start uvicorn on a free local port and wait until its dataset is loaded."""
+
+    port = _free_port()
+    env = dict(os.environ)
+    if data:
+        env["UIDAI_DATA_CSV"] = str(Path(data).resolve())
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "backend.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/api/ready", timeout=1.0).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"Server did not become ready within {startup_timeout:.0f}s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay dashboard filter traffic against the API")
+    parser.add_argument("--url", help="Target an already running server instead of spawning one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes when spawning (default: 1)")
+    parser.add_argument("--data", help="CSV to serve when spawning (sets UIDAI_DATA_CSV)")
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="Seconds to wait for the spawned server")
+    parser.add_argument("--concurrency", type=int, default=16, help="Simulated dashboard users (default: 16)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic (default: 30)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between filter changes (default: 0)")
+    parser.add_argument("--export-rate", type=float, default=0.05, help="Chance of an export per filter change")
+    parser.add_argument(
+        "--mix",
+        choices=["batch", "split"],
+        default="batch",
+        help="batch: current dashboard (one /api/batch per change); split: three separate GETs",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Traffic seed (default: 0)")
+    parser.add_argument("--label", default="", help="Name for this run in reports and comparisons")
+    parser.add_argument("--output", help="Write the run summary JSON here")
+    parser.add_argument("--baseline", help="Compare this run against a previously saved summary")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="Compare two saved summaries and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        base, head = (json.loads(Path(p).read_text()) for p in args.compare)
+        print_comparison(base, head)
+        return 0
+
+    proc = None
+    url = args.url
+    if not url:
+        proc, url = spawn_server(args.workers, args.data, args.startup_timeout)
+    try:
+        result = asyncio.run(run_load(args, url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print_report(result)
+
+    if args.output:
+        out_path = Path(args.output).resolve()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(result, indent=2))
+        print(f"\nWrote: {out_path}")
+
+    if args.baseline:
+        print_comparison(json.loads(Path(args.baseline).read_text()), result)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
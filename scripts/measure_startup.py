@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter so nothing is already imported or loaded.
+# TestClient is imported first because it is not part of the app's cost; it
+# is used without its context manager, so no lifespan preload runs and the
+# first request pays for loading, as on a serverless cold start.
+_PROBE = """
+import json, sys, time
+from fastapi.testclient import TestClient
+t0 = time.perf_counter()
+from api.index import app
+t1 = time.perf_counter()
+resp = TestClient(app).get(sys.argv[1])
+t2 = time.perf_counter()
+import backend.main as main
+loaded = main.datasets.peek(main.DEFAULT_DATASET)
+print(json.dumps({"status": resp.status_code, "import_s": t1 - t0, "first_response_s": t2 - t0,
+                  "source": loaded.load_info["source"] if loaded else None}))
+"""
+
+
+def probe(path: str, env: dict[str, str]) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE, path], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure import-to-first-response time of the API")
+    parser.add_argument("--path", default="/api/summary", help="Endpoint to request first (default: /api/summary)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start (default: 5)")
+    parser.add_argument("--data", help="CSV to serve (sets UIDAI_DATA_CSV)")
+    parser.add_argument("--artifact", help="Serving artifact to load (sets UIDAI_ARTIFACT)")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds allowed to first response (default: 1.0)")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.data:
+        env["UIDAI_DATA_CSV"] = str(Path(args.data).resolve())
+    if args.artifact:
+        env["UIDAI_ARTIFACT"] = str(Path(args.artifact).resolve())
+
+    runs = [probe(args.path, env) for _ in range(max(1, args.runs))]
+    bad = [r for r in runs if r["status"] != 200]
+    if bad:
+        print(f"{args.path} returned {bad[0]['status']}")
+        return 1
+
+    import_s = statistics.median(r["import_s"] for r in runs)
+    first_s = statistics.median(r["first_response_s"] for r in runs)
+    print(f"Source:          {runs[0]['source']}")
+    print(f"Import:          {import_s * 1e3:.0f}ms (median of {len(runs)})")
+    print(f"First response:  {first_s * 1e3:.0f}ms from import start ({args.path})")
+    if first_s > args.budget:
+        print(f"Over budget of {args.budget:.2f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.cleaning import _normalize_district
+from backend.districts import _district_similarity, _district_tokens
+from backend.serving import read_artifact
+from backend.stats import DatasetStats
+
+QUANTILES: tuple[float, ...] = (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+ROW_THRESHOLDS: tuple[int, ...] = (1, 2, 3, 5, 10, 20, 50, 100)
+TOTAL_THRESHOLDS: tuple[int, ...] = (0, 10, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def load_frame(path: Path) -> pd.DataFrame:
+    """Read the cleaned store: a serving artifact (``.pkl``) or a cleaned CSV."""
+
+    if path.suffix == ".pkl":
+        return read_artifact(path).df
+    return pd.read_csv(path, usecols=["date", "state", "district", "total_enrolments"], parse_dates=["date"])
+
+
+def district_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows and total enrolments per (state, district)."""
+
+    return (
+        df.groupby(["state", "district"], sort=True, observed=True)
+        .agg(rows=("district", "size"), total=("total_enrolments", "sum"))
+        .reset_index()
+    )
+
+
+def counts_at_least(sorted_values: np.ndarray, thresholds) -> np.ndarray:
+    """How many of ``sorted_values`` (ascending) are >= each threshold."""
+
+    return len(sorted_values) - np.searchsorted(sorted_values, np.asarray(thresholds), side="left")
+
+
+def distribution(values: np.ndarray, thresholds: tuple[int, ...]) -> dict:
+    ordered = np.sort(values.astype(float))
+    if not len(ordered):
+        return {"quantiles": {}, "at_least": {}}
+    qs = np.quantile(ordered, QUANTILES)
+    return {
+        "quantiles": {f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, qs)},
+        "at_least": {int(t): int(c) for t, c in zip(thresholds, counts_at_least(ordered, thresholds))},
+    }
+
+
+def calibrate(stats: DatasetStats, targets: list[int]) -> list[dict]:
+    """Closest ``district_min_total`` for each target active-district count.
+
+    Every distinct total is a candidate threshold; counts for all of them come
+    from one vectorized searchsorted over the sorted totals. Ties resolve to
+    the lowest threshold.
+    """
+
+    candidates = np.unique(stats.district_totals)
+    if not len(candidates):
+        return [{"target": t, "district_min_total": None, "districts_active": 0} for t in targets]
+    counts = counts_at_least(stats.district_totals, candidates)
+
+    out = []
+    for target in targets:
+        i = int(np.argmin(np.abs(counts - target)))
+        threshold = int(np.ceil(candidates[i]))
+        out.append(
+            {
+                "target": int(target),
+                "district_min_total": threshold,
+                # Confirm against the same code path /api/summary uses
+                "districts_active": stats.districts_active(threshold),
+            }
+        )
+    return out
+
+
+def variant_clusters(table: pd.DataFrame, *, similarity: float, limit: int) -> dict:
+    """Group district spellings that the cleaner's normalization or similarity would treat as one.
+
+    ``normalized`` clusters are names that ``_normalize_district`` maps to the
+    same key (case or label drift, e.g. a CSV cleaned by an older version).
+    ``similar`` clusters attach each district to the most frequent, highly
+    similar district in the same state, scored the way the rare-variant merge
+    scores candidates but without its occurrence limits, so it also shows
+    near-duplicates the merge leaves alone.
+    """
+
+    keys = table["district"].astype(str).map(_normalize_district).str.lower()
+    by_key = table.assign(key=keys).groupby(["state", "key"], sort=False)
+    normalized = [
+        {
+            "state": state,
+            "key": key,
+            "variants": sub.sort_values("rows", ascending=False)[["district", "rows", "total"]].to_dict("records"),
+        }
+        for (state, key), sub in by_key
+        if len(sub) > 1
+    ]
+    normalized.sort(key=lambda c: -sum(v["rows"] for v in c["variants"]))
+
+    similar: dict[tuple[str, str], list[dict]] = {}
+    for state, sub in table.groupby("state", sort=False):
+        # Most frequent first, so each name can only attach to a more common one
+        sub = sub.sort_values(["rows", "district"], ascending=[False, True])
+        names = sub["district"].astype(str).tolist()
+        rows = sub["rows"].to_numpy()
+        totals = sub["total"].to_numpy()
+        toks = [_district_tokens(n) for n in names]
+        for i in range(1, len(names)):
+            if not toks[i]:
+                continue
+            best, best_score = None, 0.0
+            for j in range(i):
+                score = _district_similarity(names[i], names[j], toks[i], toks[j])
+                if score is not None and score > best_score:
+                    best, best_score = j, score
+            if best is not None and best_score >= similarity:
+                similar.setdefault((state, names[best]), []).append(
+                    {"district": names[i], "rows": int(rows[i]), "total": float(totals[i]), "score": round(best_score, 4)}
+                )
+
+    similar_out = [
+        {"state": state, "canonical": name, "variants": variants}
+        for (state, name), variants in similar.items()
+    ]
+    similar_out.sort(key=lambda c: -len(c["variants"]))
+
+    return {
+        "normalized_clusters": len(normalized),
+        "similar_clusters": len(similar_out),
+        "normalized": normalized[:limit],
+        "similar": similar_out[:limit],
+    }
+
+
+def profile(df: pd.DataFrame, *, targets: list[int], similarity: float, limit: int) -> dict:
+    table = district_table(df)
+    stats = DatasetStats.from_frame(df)
+    return {
+        "rows": int(len(df)),
+        "states": int(df["state"].nunique()),
+        "districts_by_name": stats.districts,
+        "districts_by_state_and_name": int(len(table)),
+        "rows_per_district": distribution(table["rows"].to_numpy(), ROW_THRESHOLDS),
+        # Totals per district name, as counted by districts_active in /api/summary
+        "total_per_district": distribution(stats.district_totals, TOTAL_THRESHOLDS),
+        "calibration": calibrate(stats, targets),
+        "variants": variant_clusters(table, similarity=similarity, limit=limit),
+    }
+
+
+def _print_distribution(title: str, dist: dict) -> None:
+    print(f"\n{title}")
+    print("  " + "  ".join(f"{k}={v:,.0f}" for k, v in dist["quantiles"].items()))
+    for t, c in dist["at_least"].items():
+        print(f"  >= {t:<8,} {c:>8,}")
+
+
+def print_report(report: dict) -> None:
+    print(f"Rows:       {report['rows']:,}")
+    print(f"States:     {report['states']:,}")
+    print(f"Districts:  {report['districts_by_name']:,} names, {report['districts_by_state_and_name']:,} (state, district)")
+
+    _print_distribution("Rows per (state, district)", report["rows_per_district"])
+    _print_distribution("Total enrolments per district name", report["total_per_district"])
+
+    if report["calibration"]:
+        print("\ndistrict_min_total calibration")
+        for c in report["calibration"]:
+            print(f"  target {c['target']:>6,} -> district_min_total={c['district_min_total']} ({c['districts_active']:,} active)")
+
+    v = report["variants"]
+    print(f"\nNormalization clusters: {v['normalized_clusters']}")
+    for c in v["normalized"]:
+        spellings = ", ".join(f"{x['district']} ({x['rows']})" for x in c["variants"])
+        print(f"  {c['state']} / {c['key']}: {spellings}")
+    print(f"\nSimilarity clusters: {v['similar_clusters']}")
+    for c in v["similar"]:
+        spellings = ", ".join(f"{x['district']} ({x['rows']}, {x['score']:.2f})" for x in c["variants"])
+        print(f"  {c['state']} / {c['canonical']} <- {spellings}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile district distributions and spelling variants in the cleaned data")
+    parser.add_argument(
+        "--input",
+        default=str(Path("data") / "api_data_aadhar_enrolment.cleaned.csv"),
+        help="Cleaned CSV or serving artifact (.pkl) (default: data/api_data_aadhar_enrolment.cleaned.csv)",
+    )
+    parser.add_argument(
+        "--target",
+        type=int,
+        nargs="*",
+        default=[],
+        help="Active-district counts to calibrate district_min_total for, e.g. --target 813",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        default=0.85,
+        help="Minimum similarity for the similarity clusters (default: 0.85)",
+    )
+    parser.add_argument("--limit", type=int, default=25, help="Clusters to list per kind (default: 25)")
+    parser.add_argument("--json", help="Also write the full report as JSON to this path")
+    args = parser.parse_args()
+
+    df = load_frame(Path(args.input).resolve())
+    report = profile(df, targets=args.target, similarity=args.similarity, limit=args.limit)
+    print_report(report)
+
+    if args.json:
+        out_path = Path(args.json).resolve()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote: {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
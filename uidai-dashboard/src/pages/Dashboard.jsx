@@ -164,41 +164,40 @@ export default function Dashboard() {
     // Get true filtered counts from the backend (full dataset)
     const controller = new AbortController();
 
-    const params = buildFilterParams();
-    params.set("district_min_total", String(DISTRICT_MIN_TOTAL_FOR_COUNT));
-
-    fetch(`/api/filtered_summary?${params.toString()}`, { signal: controller.signal })
+    // Filtered summary, state totals (What-If analysis) and action recommendations
+    // share one filter spec, so fetch them in a single batch round trip.
+    fetch(`/api/batch`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        filters: { ...buildFilterSpec(), district_min_total: DISTRICT_MIN_TOTAL_FOR_COUNT },
+        queries: [
+          { name: "filtered_summary", type: "filtered_summary" },
+          { name: "state_totals", type: "state_totals" },
+          { name: "action_recommendations", type: "action_recommendations" },
+        ],
+      }),
+      signal: controller.signal,
+    })
       .then((r) => (r.ok ? r.json() : null))
       .then((payload) => {
-        if (payload && typeof payload === "object") setFilteredSummary(payload);
+        const results = payload?.results;
+        if (!results || typeof results !== "object") return;
+        if (results.filtered_summary && typeof results.filtered_summary === "object") {
+          setFilteredSummary(results.filtered_summary);
+        }
+        if (results.state_totals && typeof results.state_totals === "object") {
+          setStateTotalsPayload(results.state_totals);
+        }
+        if (results.action_recommendations && typeof results.action_recommendations === "object") {
+          setActionRecs(results.action_recommendations);
+        }
       })
       .catch((e) => {
         if (e?.name === "AbortError") return;
         // ignore; UI can fall back to local counts
       });
 
-    // State totals for What-If analysis (full dataset)
-    const params2 = buildFilterParams();
-    fetch(`/api/state_totals?${params2.toString()}`, { signal: controller.signal })
-      .then((r) => (r.ok ? r.json() : null))
-      .then((payload) => {
-        if (payload && typeof payload === "object") setStateTotalsPayload(payload);
-      })
-      .catch((e) => {
-        if (e?.name === "AbortError") return;
-      });
-
-    // Action recommendations (full dataset)
-    const params3 = buildFilterParams();
-    fetch(`/api/action_recommendations?${params3.toString()}`, { signal: controller.signal })
-      .then((r) => (r.ok ? r.json() : null))
-      .then((payload) => {
-        if (payload && typeof payload === "object") setActionRecs(payload);
-      })
-      .catch((e) => {
-        if (e?.name === "AbortError") return;
-      });
-
     return () => controller.abort();
   }, [filters]);
 
@@ -600,6 +599,19 @@ export default function Dashboard() {
     return params;
   }
 
+  function buildFilterSpec() {
+    const params = buildFilterParams();
+    const spec = {};
+    ["start", "end", "search"].forEach((k) => {
+      if (params.has(k)) spec[k] = params.get(k);
+    });
+    ["states", "districts", "age_groups"].forEach((k) => {
+      const values = params.getAll(k);
+      if (values.length) spec[k] = values;
+    });
+    return spec;
+  }
+
   const downloadByState = async () => {
     try {
       const params = buildFilterParams();